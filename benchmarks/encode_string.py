@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+
+'''
+Times encoding long random string literals.
+'''
+
+import random
+import timeit
+
+from stringfuzz.constants import SMT_25_STRING
+from stringfuzz.generator import encode_char, encode_string
+from stringfuzz.scanner import ALPHABET, WHITESPACE
+
+# constants
+LITERAL_LENGTH = 1000000
+NUM_REPEATS    = 5
+SAFE_CHARS     = [c for c in ALPHABET if c not in '"\\']
+ALL_CHARS      = ALPHABET + WHITESPACE
+
+# helpers
+def per_char_encode_string(s, language):
+    return '"' + ''.join(encode_char(c, language) for c in s) + '"'
+
+def bench(name, function, literal):
+    elapsed = min(timeit.repeat(lambda: function(literal, SMT_25_STRING), number=1, repeat=NUM_REPEATS))
+    print('{:<24} {:>10.4f}s'.format(name, elapsed))
+
+def main():
+    random.seed(0)
+    safe  = ''.join(random.choice(SAFE_CHARS) for i in range(LITERAL_LENGTH))
+    mixed = ''.join(random.choice(ALL_CHARS) for i in range(LITERAL_LENGTH))
+
+    bench('per-char (safe)',  per_char_encode_string, safe)
+    bench('table (safe)',     encode_string,          safe)
+    bench('per-char (mixed)', per_char_encode_string, mixed)
+    bench('table (mixed)',    encode_string,          mixed)
+
+if __name__ == '__main__':
+    main()
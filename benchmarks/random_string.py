@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+
+'''
+Times making long random string literals.
+'''
+
+import random
+import timeit
+
+from stringfuzz.scanner import ALPHABET
+from stringfuzz.util import random_string
+
+# constants
+LITERAL_LENGTH = 1000000
+NUM_REPEATS    = 5
+
+# helpers
+def per_char_random_string(length, rng):
+    return ''.join(rng.choice(ALPHABET) for i in range(length))
+
+def bench(name, function):
+    rng     = random.Random(0)
+    elapsed = min(timeit.repeat(lambda: function(LITERAL_LENGTH, rng), number=1, repeat=NUM_REPEATS))
+    print('{:<24} {:>10.4f}s'.format(name, elapsed))
+
+def main():
+    bench('per-char', per_char_random_string)
+    bench('bulk',     random_string)
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,48 @@
 import re
 
-from collections import namedtuple
+from collections import namedtuple, Counter
+from stringfuzz.ast import StringLitNode, ConcatNode, IdentifierNode
+from stringfuzz.ast import CompoundSortNode, GenericExpressionNode, FunctionDeclarationNode, ConstantDeclarationNode
 from stringfuzz.ast_walker import ASTWalker
 
 __all__ = [
     'analyse',
+    'summarise',
+    'SummaryWalker',
+    'get_length_bucket',
+    'SUMMED_STATS',
+    'MAXIMUM_STATS',
+    'HISTOGRAM_STATS',
 ]
 
-ZERO_DEPTH = 1
+ZERO_DEPTH    = 1
+DECLARE_CONST = 'declare-const'
+
+# NOTE:
+#      summaries hold three kinds of stats, which are merged across problems
+#      in different ways: totals are added, maxima are maxed, and histograms
+#      (dicts of counts) are added key by key
+SUMMED_STATS = [
+    'expressions',
+    'variables',
+    'literals',
+    'string_literals',
+    'string_literal_length',
+]
+
+MAXIMUM_STATS = [
+    'max_string_literal_length',
+    'max_depth',
+    'max_nesting',
+]
+
+HISTOGRAM_STATS = [
+    'depths',
+    'nestings',
+    'string_literal_lengths',
+    'operators',
+    'variable_sorts',
+]
 
 # NOTE:
 #      depth   - depth in tree
@@ -105,7 +140,149 @@ class StatsWalker(ASTWalker):
         assert self.point is not None
         self.variables.add(variable.name)
 
+class SummaryWalker(ASTWalker):
+    '''
+    Accumulates a problem's stats in one walk. Only counters, and the symbols
+    and nesting levels of the expressions above the current one, are kept, so
+    nothing is held on to per node.
+    '''
+
+    def __init__(self, ast):
+        super().__init__(ast)
+
+        # bookkeeping
+        self.symbol_stack  = []
+        self.nesting_stack = []
+
+        # results
+        self.expressions               = 0
+        self.variables                 = set()
+        self.literals                  = 0
+        self.string_literals           = 0
+        self.string_literal_length     = 0
+        self.max_string_literal_length = 0
+
+        self.depths                 = Counter()
+        self.nestings               = Counter()
+        self.string_literal_lengths = Counter()
+        self.operators              = Counter()
+        self.variable_sorts         = Counter()
+
+    def enter_expression(self, expression, parent):
+        symbol = get_symbol_name(expression)
+        depth  = len(self.symbol_stack) + ZERO_DEPTH
+
+        # nesting goes up when an expression is inside one with the same symbol
+        if len(self.symbol_stack) > 0 and self.symbol_stack[-1] == symbol:
+            nesting = self.nesting_stack[-1] + 1
+        else:
+            nesting = ZERO_DEPTH
+
+        # count it
+        self.expressions       += 1
+        self.depths[depth]     += 1
+        self.operators[symbol] += 1
+
+        if isinstance(expression, ConcatNode):
+            self.nestings[nesting] += 1
+
+        sort = get_declared_sort(expression)
+        if sort is not None:
+            self.variable_sorts[sort] += 1
+
+        # push symbol and nesting
+        self.symbol_stack.append(symbol)
+        self.nesting_stack.append(nesting)
+
+    def exit_expression(self, expression, parent):
+        self.symbol_stack.pop()
+        self.nesting_stack.pop()
+
+    def enter_literal(self, literal, parent):
+        self.literals += 1
+
+        if isinstance(literal, StringLitNode):
+            length = len(literal)
+
+            self.string_literals           += 1
+            self.string_literal_length     += length
+            self.max_string_literal_length  = max(self.max_string_literal_length, length)
+
+            self.string_literal_lengths[get_length_bucket(length)] += 1
+
+    def enter_identifier(self, variable, parent):
+        self.variables.add(variable.name)
+
+    def to_dict(self):
+        return {
+            'expressions':               self.expressions,
+            'variables':                 len(self.variables),
+            'literals':                  self.literals,
+            'string_literals':           self.string_literals,
+            'string_literal_length':     self.string_literal_length,
+            'max_string_literal_length': self.max_string_literal_length,
+            'max_depth':                 max(self.depths, default=0),
+            'max_nesting':               max(self.nestings, default=0),
+            'depths':                    dict(self.depths),
+            'nestings':                  dict(self.nestings),
+            'string_literal_lengths':    dict(self.string_literal_lengths),
+            'operators':                 dict(self.operators),
+            'variable_sorts':            dict(self.variable_sorts),
+        }
+
+def get_symbol_name(expression):
+    symbol = expression.symbol
+    if isinstance(symbol, IdentifierNode):
+        return symbol.name
+    return str(symbol)
+
+def get_sort_name(sort):
+
+    # NOTE:
+    #      declare-const is parsed as a generic expression, so its sort is
+    #      parsed as an identifier
+    if isinstance(sort, CompoundSortNode):
+        return '({} {})'.format(sort.constructor.name, ' '.join(get_sort_name(s) for s in sort.sorts))
+    return sort.name
+
+def get_declared_sort(expression):
+    '''
+    Get the name of the sort of the variable that an expression declares, or
+    None if it doesn't declare one.
+    '''
+    if isinstance(expression, GenericExpressionNode):
+        if get_symbol_name(expression) == DECLARE_CONST:
+            return get_sort_name(expression.body[1])
+
+    if isinstance(expression, ConstantDeclarationNode):
+        return get_sort_name(expression.body[1])
+
+    # functions with no arguments are variables too
+    if isinstance(expression, FunctionDeclarationNode):
+        if len(expression.body[1].body) == 0:
+            return get_sort_name(expression.body[2])
+
+    return None
+
+def get_length_bucket(length):
+    '''
+    Get the histogram bucket of a length: the biggest power of 2 that's no
+    bigger than it, or 0.
+    '''
+    if length == 0:
+        return 0
+    return 1 << (length.bit_length() - 1)
+
 def analyse(ast):
     walker = StatsWalker(ast)
     walker.walk()
     return walker.points, walker.variables, walker.literals
+
+def summarise(ast):
+    '''
+    Get a problem's stats, as a dict of plain numbers and histograms that
+    can be merged with other problems' stats.
+    '''
+    walker = SummaryWalker(ast)
+    walker.walk()
+    return walker.to_dict()
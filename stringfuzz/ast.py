@@ -114,7 +114,7 @@ class CompoundSortNode(SortNode):
         self.sorts = sorts
 
     def __repr__(self):
-        return 'Sort<{} {}>'.format(self.symbol, with_spaces(self.sorts))
+        return 'Sort<{} {}>'.format(self.constructor, with_spaces(self.sorts))
 
 class SettingNode(_ASTNode):
     def __init__(self, name):
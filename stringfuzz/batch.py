@@ -0,0 +1,204 @@
+'''
+Transforming whole suites of problems.
+
+The problems in some directories, or matched by some globs, are transformed
+in a pool of processes, and written to the same relative paths in an output
+directory. Work is handed to the workers in chunks, so that short problems
+don't spend most of their time in inter-process communication. A problem that
+can't be read, parsed or generated doesn't stop the batch: its manifest record
+says what went wrong instead.
+'''
+
+import os
+import re
+import glob
+import zlib
+import lzma
+import random
+import hashlib
+import multiprocessing
+
+from collections import namedtuple
+
+from stringfuzz.compression import EXTENSIONS
+from stringfuzz.corpus import TASKS_PER_WORKER, write_file, describe_stage
+from stringfuzz.generator import generate, NotSupported
+from stringfuzz.parser import parse_file, ParsingError
+from stringfuzz.pipeline import run_pipeline, reseed_stages, filter_commands
+from stringfuzz.scanner import ScanningError
+from stringfuzz.sharing import share
+from stringfuzz.util import instance_seed
+
+__all__ = [
+    'find_problems',
+    'transform_problems',
+    'PROBLEM_EXTENSIONS',
+]
+
+# constants
+PROBLEM_EXTENSIONS = ['.smt2', '.smt']
+MAGIC_PATTERN      = re.compile('[*?[]')
+
+# errors that only affect one problem
+PROBLEM_ERRORS = (
+    ParsingError,
+    ScanningError,
+    NotSupported,
+    UnicodeDecodeError,
+    OSError,
+
+    # truncated or corrupt compressed files
+    EOFError,
+    zlib.error,
+    lzma.LZMAError,
+
+    # problems nested too deeply to parse or walk
+    RecursionError,
+)
+
+# data structures
+BatchTask = namedtuple('BatchTask', ('transformation', 'input_language', 'index', 'seed', 'path', 'out_path', 'relative_path'))
+
+# helpers
+def strip_compression(path):
+    for extension in EXTENSIONS.values():
+        if extension != '' and path.endswith(extension):
+            return path[:-len(extension)]
+    return path
+
+def is_problem(path):
+    return any(strip_compression(path).endswith(extension) for extension in PROBLEM_EXTENSIONS)
+
+def get_glob_root(pattern):
+    '''
+    Get the longest leading directory of a glob with no wildcards in it.
+    '''
+    root = os.path.dirname(pattern)
+    while MAGIC_PATTERN.search(root) is not None:
+        root = os.path.dirname(root)
+    return root
+
+def walk_problems(directory):
+    for parent, directories, names in os.walk(directory):
+        directories.sort()
+        for name in sorted(names):
+            path = os.path.join(parent, name)
+            if is_problem(path):
+                yield path
+
+def transform_problem(task):
+    transformation = task.transformation
+
+    # describe it
+    record = {
+        'file':   task.relative_path,
+        'input':  task.path,
+        'index':  task.index,
+        'seed':   task.seed,
+        'stages': [describe_stage(stage) for stage in transformation.stages],
+    }
+
+    try:
+
+        # transform it
+        rng    = random.Random(task.seed)
+        stages = reseed_stages(transformation.stages, rng)
+        ast    = parse_file(task.path, task.input_language)
+        ast    = run_pipeline(filter_commands(ast, stages), stages)
+
+        # emit repeated subterms once if required
+        if transformation.share is True:
+            ast = share(ast)
+
+        # write it out
+        text = generate(ast, transformation.language)
+        os.makedirs(os.path.dirname(task.out_path), exist_ok=True)
+        data = write_file(task.out_path, text, transformation.compression)
+
+    # report errors instead of stopping the batch
+    except PROBLEM_ERRORS as e:
+        record['error'] = '{}: {}'.format(type(e).__name__, e)
+        return record
+
+    record['language']    = transformation.language
+    record['compression'] = transformation.compression
+    record['size']        = len(data)
+    record['sha256']      = hashlib.sha256(data).hexdigest()
+    return record
+
+def run_batch(tasks, jobs):
+
+    # run in this process if there's only one job
+    if jobs < 2:
+        yield from map(transform_problem, tasks)
+        return
+
+    # give each worker a few chunks, so that the work stays balanced
+    chunk_size = max(1, len(tasks) // (jobs * TASKS_PER_WORKER))
+    with multiprocessing.Pool(jobs) as pool:
+        yield from pool.imap(transform_problem, tasks, chunk_size)
+
+# public API
+def find_problems(inputs):
+    '''
+    Find the problems in each input, a directory or a glob. Returns pairs of
+    each problem's path and its path relative to the input, in order.
+    Directories are searched recursively for files with problem extensions,
+    compressed or not; globs can match any file.
+    '''
+    problems = []
+    seen     = set()
+    for pattern in inputs:
+
+        # directories
+        if os.path.isdir(pattern):
+            root  = pattern
+            paths = walk_problems(pattern)
+
+        # globs and single files
+        else:
+            root  = get_glob_root(pattern)
+            paths = sorted(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+
+        for path in paths:
+            real_path = os.path.realpath(path)
+            if real_path in seen:
+                continue
+            seen.add(real_path)
+            problems.append((path, os.path.relpath(path, root or os.curdir)))
+
+    return problems
+
+def transform_problems(problems, transformation, input_language, seed, out_dir, jobs):
+    '''
+    Transform problems, pairs of paths and relative paths, with the stages of
+    a transformation, writing each one to its relative path in out_dir, using
+    jobs processes. Each problem's stages get their own RNG, seeded from the
+    seed and the problem's number. Returns an iterator over a manifest record
+    for each problem, in order. Raises ValueError, before transforming any,
+    if two problems would be written to the same path.
+    '''
+
+    # find where each problem goes
+    tasks     = []
+    out_paths = {}
+    for i, (path, relative_path) in enumerate(problems):
+        relative_path = strip_compression(relative_path) + EXTENSIONS[transformation.compression]
+        out_path      = os.path.join(out_dir, relative_path)
+
+        if out_path in out_paths:
+            raise ValueError('{!r} and {!r} would both be written to {!r}'.format(out_paths[out_path], path, out_path))
+        out_paths[out_path] = path
+
+        tasks.append(BatchTask(
+            transformation = transformation,
+            input_language = input_language,
+            index          = i,
+            seed           = instance_seed(seed, i),
+            path           = path,
+            out_path       = out_path,
+            relative_path  = relative_path,
+        ))
+
+    os.makedirs(out_dir, exist_ok=True)
+    return run_batch(tasks, jobs)
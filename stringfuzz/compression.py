@@ -0,0 +1,185 @@
+'''
+Transparent reading and writing of compressed problems.
+
+Compressed input is recognised by its magic bytes, so gzip, xz and bzip2
+files (and streams) can be read wherever plain ones can. Output can be
+compressed as it is written, without holding the compressed text in memory.
+'''
+
+import io
+import sys
+import bz2
+import gzip
+import lzma
+import argparse
+import contextlib
+
+__all__ = [
+    'open_text',
+    'read_text',
+    'open_output',
+    'compress',
+    'InputFile',
+    'get_extension',
+    'detect_compression',
+    'COMPRESSIONS',
+    'NO_COMPRESSION',
+    'GZIP',
+    'XZ',
+    'BZIP2',
+    'STDIO_PATH',
+]
+
+# constants
+NO_COMPRESSION = 'none'
+GZIP           = 'gzip'
+XZ             = 'xz'
+BZIP2          = 'bz2'
+
+COMPRESSIONS = [
+    NO_COMPRESSION,
+    GZIP,
+    XZ,
+    BZIP2,
+]
+
+MAGIC_BYTES = {
+    GZIP:  b'\x1f\x8b',
+    XZ:    b'\xfd7zXZ\x00',
+    BZIP2: b'BZh',
+}
+
+EXTENSIONS = {
+    NO_COMPRESSION: '',
+    GZIP:           '.gz',
+    XZ:             '.xz',
+    BZIP2:          '.bz2',
+}
+
+MAGIC_SIZE = max(len(magic) for magic in MAGIC_BYTES.values())
+STDIO_PATH = '-'
+
+# data structures
+class PrefixedStream(io.RawIOBase):
+    '''
+    A binary stream that reads some bytes that were already read from
+    another stream, and then the rest of that stream.
+    '''
+
+    def __init__(self, prefix, stream):
+        self.prefix = prefix
+        self.stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if len(self.prefix) > 0:
+            size          = min(len(buffer), len(self.prefix))
+            buffer[:size] = self.prefix[:size]
+            self.prefix   = self.prefix[size:]
+            return size
+
+        data          = self.stream.read(len(buffer))
+        size          = len(data)
+        buffer[:size] = data
+        return size
+
+    def close(self):
+        self.stream.close()
+        super().close()
+
+class InputFile(object):
+    '''
+    An argparse type, like argparse.FileType('r'), that opens compressed
+    files transparently. The path '-' means stdin.
+    '''
+
+    def __call__(self, path):
+        if path == STDIO_PATH:
+            return open_stream(sys.stdin.buffer)
+
+        try:
+            return open_text(path)
+        except OSError as e:
+            raise argparse.ArgumentTypeError('can\'t open {!r}: {}'.format(path, e))
+
+    def __repr__(self):
+        return '{}()'.format(type(self).__name__)
+
+# helpers
+def detect_compression(head):
+    for compression, magic in MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return compression
+    return NO_COMPRESSION
+
+def make_decompressor(stream, compression):
+    if compression == GZIP:
+        return gzip.GzipFile(fileobj=stream, mode='rb')
+    if compression == XZ:
+        return lzma.LZMAFile(stream, mode='rb')
+    if compression == BZIP2:
+        return bz2.BZ2File(stream, mode='rb')
+    return stream
+
+def make_compressor(stream, compression):
+
+    # NOTE:
+    #      gzip headers get no name and no time, so that the same text always
+    #      compresses to the same bytes
+    if compression == GZIP:
+        return gzip.GzipFile(filename='', fileobj=stream, mode='wb', mtime=0)
+    if compression == XZ:
+        return lzma.LZMAFile(stream, mode='wb')
+    if compression == BZIP2:
+        return bz2.BZ2File(stream, mode='wb')
+    raise ValueError('unknown compression {!r}'.format(compression))
+
+def open_stream(binary):
+    '''
+    Open a binary stream as text, decompressing it if needed.
+    '''
+    head        = binary.read(MAGIC_SIZE)
+    compression = detect_compression(head)
+    stream      = io.BufferedReader(PrefixedStream(head, binary))
+    return io.TextIOWrapper(make_decompressor(stream, compression))
+
+# public API
+def get_extension(compression):
+    return EXTENSIONS[compression]
+
+def open_text(path):
+    return open_stream(open(path, 'rb'))
+
+def read_text(path):
+    with open_text(path) as file:
+        return file.read()
+
+def compress(data, compression):
+    if compression == NO_COMPRESSION:
+        return data
+
+    buffer = io.BytesIO()
+    with make_compressor(buffer, compression) as compressor:
+        compressor.write(data)
+    return buffer.getvalue()
+
+@contextlib.contextmanager
+def open_output(stream, compression):
+    '''
+    Write text to a text stream, like stdout, compressing it as it's written.
+    The stream itself is left open.
+    '''
+    if compression == NO_COMPRESSION:
+        yield stream
+        return
+
+    stream.flush()
+    compressor = make_compressor(stream.buffer, compression)
+    wrapper    = io.TextIOWrapper(compressor, encoding=stream.encoding)
+    try:
+        yield wrapper
+    finally:
+        wrapper.close()
+        stream.buffer.flush()
@@ -0,0 +1,351 @@
+'''
+Bulk generation of problem corpora.
+
+Every instance gets its own RNG, seeded from the corpus seed and the
+instance's index, so any one instance can be remade on its own: the seed in
+its manifest record, given to stringfuzzg as --seed, makes it again. Workers
+write their instances straight to disk and only send back a small manifest
+record, so memory use doesn't depend on the size of the corpus.
+
+Corpora can also be made by transforming one seed problem many times. The
+seed is parsed once, and sent to each worker once, pickled; every variant
+gets a fresh copy of it by unpickling, which is much cheaper than parsing.
+'''
+
+import os
+import json
+import pickle
+import random
+import hashlib
+import itertools
+import multiprocessing
+
+from collections import namedtuple, deque
+
+from stringfuzz.generator import generate
+from stringfuzz.compression import compress, get_extension, NO_COMPRESSION
+from stringfuzz.sharing import share
+from stringfuzz.pipeline import run_pipeline, reseed_stages
+from stringfuzz.smt import smt_get_model, smt_string_logic
+from stringfuzz.util import instance_seed
+
+__all__ = [
+    'Recipe',
+    'make_problem',
+    'make_corpus',
+    'make_sweep',
+    'make_variants',
+    'write_manifest',
+    'Transformation',
+    'parse_sweep',
+    'get_sweep_name',
+    'make_points',
+    'imap_bounded',
+    'MANIFEST_NAME',
+]
+
+# constants
+MANIFEST_NAME    = 'manifest.jsonl'
+FILE_EXTENSION   = '.smt2'
+TASKS_PER_WORKER = 4
+
+FLOAT_DIGITS     = 12
+
+# sweep syntax
+ASSIGNMENT_SEPARATOR = '='
+LIST_SEPARATOR       = ','
+RANGE_SEPARATOR      = ':'
+GEOMETRIC_PREFIX     = '*'
+
+# data structures
+Recipe = namedtuple('Recipe', ('name', 'generator', 'parameters', 'language', 'produce_models', 'share', 'compression'), defaults=(NO_COMPRESSION,))
+Task   = namedtuple('Task', ('recipe', 'index', 'seed', 'path', 'point'))
+
+Transformation = namedtuple('Transformation', ('name', 'stages', 'language', 'share', 'compression'), defaults=(NO_COMPRESSION,))
+VariantTask    = namedtuple('VariantTask', ('transformation', 'index', 'seed', 'path'))
+
+# worker state
+# NOTE:
+#      the pickled seed problem of make_variants; it's set in each worker
+#      when its pool starts, so that it isn't sent again with every task
+seed_problem = None
+
+# helpers
+def get_file_name(recipe, index, count):
+    width = len(str(max(count - 1, 0)))
+    return '{}-{:0{}d}{}{}'.format(recipe.name, index, width, FILE_EXTENSION, get_extension(recipe.compression))
+
+def make_arithmetic_range(start, stop, step):
+    if step == 0:
+        raise ValueError('step must not be zero')
+
+    # NOTE:
+    #      values are computed from the start every time, and floats are
+    #      rounded, so that errors don't accumulate
+    values = []
+    value  = start
+    while (step > 0 and value <= stop) or (step < 0 and value >= stop):
+        values.append(value)
+        value = start + len(values) * step
+        if isinstance(value, float):
+            value = round(value, FLOAT_DIGITS)
+    return values
+
+def make_geometric_range(start, stop, factor, value_type):
+    if start <= 0 or factor <= 1:
+        raise ValueError('geometric ranges need a positive start and a factor above 1')
+
+    # NOTE:
+    #      fractional factors can round to the same integer twice, so
+    #      repeated values are dropped
+    values = []
+    value  = start
+    while value <= stop:
+        rounded = value_type(round(value)) if value_type is int else value_type(value)
+        if rounded not in values:
+            values.append(rounded)
+        value *= factor
+    return values
+
+def run_tasks(function, tasks, jobs, initializer=None, initargs=()):
+
+    # run in this process if there's only one job
+    if jobs < 2:
+        if initializer is not None:
+            initializer(*initargs)
+        yield from map(function, tasks)
+        return
+
+    with multiprocessing.Pool(jobs, initializer, initargs) as pool:
+        yield from imap_bounded(pool, function, tasks, jobs * TASKS_PER_WORKER)
+
+def write_file(path, text, compression):
+    data = compress((text + '\n').encode(), compression)
+    with open(path, 'wb') as file:
+        file.write(data)
+    return data
+
+def describe_stage(stage):
+    arguments = {name: value for name, value in stage.arguments.items() if name != 'rng'}
+    return {'transformer': stage.transformer.__name__, 'arguments': arguments}
+
+def make_instance(task):
+
+    # make the problem
+    rng  = random.Random(task.seed)
+    text = make_problem(task.recipe, rng)
+
+    # write it out
+    data = write_file(task.path, text, task.recipe.compression)
+
+    # describe it
+    record = {
+        'file':        os.path.basename(task.path),
+        'index':       task.index,
+        'seed':        task.seed,
+        'generator':   task.recipe.name,
+        'parameters':  task.recipe.parameters,
+        'language':    task.recipe.language,
+        'compression': task.recipe.compression,
+        'size':        len(data),
+        'sha256':      hashlib.sha256(data).hexdigest(),
+    }
+
+    # say which parameters were swept, if any
+    if task.point is not None:
+        record['point'] = task.point
+
+    return record
+
+def set_seed_problem(data):
+    global seed_problem
+    seed_problem = data
+
+def make_variant(task):
+
+    # transform a fresh copy of the seed problem
+    transformation = task.transformation
+    rng            = random.Random(task.seed)
+    stages         = reseed_stages(transformation.stages, rng)
+    ast            = run_pipeline(pickle.loads(seed_problem), stages)
+
+    # emit repeated subterms once if required
+    if transformation.share is True:
+        ast = share(ast)
+
+    # write it out
+    text = generate(ast, transformation.language)
+    data = write_file(task.path, text, transformation.compression)
+
+    # describe it
+    return {
+        'file':        os.path.basename(task.path),
+        'index':       task.index,
+        'seed':        task.seed,
+        'stages':      [describe_stage(stage) for stage in transformation.stages],
+        'language':    transformation.language,
+        'compression': transformation.compression,
+        'size':        len(data),
+        'sha256':      hashlib.sha256(data).hexdigest(),
+    }
+
+# public API
+def make_problem(recipe, rng):
+    generated = recipe.generator(rng=rng, **recipe.parameters)
+
+    # the random text generator produces raw text
+    if isinstance(generated, str):
+        return generated
+
+    # prepend the logic setting
+    generated = [smt_string_logic()] + generated
+
+    # add the model-getting node if needed
+    if recipe.produce_models is True:
+        generated.append(smt_get_model())
+
+    # emit repeated subterms once if required
+    if recipe.share is True:
+        generated = share(generated)
+
+    return generate(generated, recipe.language)
+
+def imap_bounded(pool, function, items, window):
+    '''
+    Like Pool.imap, but only keeps a bounded number of items in flight,
+    instead of queueing all of them up front.
+    '''
+    pending = deque()
+    for item in items:
+        pending.append(pool.apply_async(function, (item,)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+
+    while len(pending) > 0:
+        yield pending.popleft().get()
+
+def make_corpus(recipe, seed, count, out_dir, jobs):
+    '''
+    Make count instances of a recipe in out_dir, using jobs processes.
+    Yields a manifest record for each instance, in order.
+    '''
+    os.makedirs(out_dir, exist_ok=True)
+
+    tasks = (
+        Task(
+            recipe = recipe,
+            index  = i,
+            seed   = instance_seed(seed, i),
+            path   = os.path.join(out_dir, get_file_name(recipe, i, count)),
+            point  = None,
+        )
+        for i in range(count)
+    )
+
+    yield from run_tasks(make_instance, tasks, jobs)
+
+def get_sweep_name(spec):
+    '''
+    Get the name of the parameter that a sweep is over. Option names, like
+    --num-vars, are turned into parameter names, like num_vars.
+    '''
+    name, separator, values = spec.partition(ASSIGNMENT_SEPARATOR)
+    return name.strip().lstrip('-').replace('-', '_')
+
+def parse_sweep(spec, value_type=int):
+    '''
+    Parse a sweep over one parameter. Returns the parameter's name and its
+    values. The spec is one of:
+
+        NAME=V1,V2,...              the given values
+        NAME=START:STOP[:STEP]      START, START+STEP, ... up to STOP
+        NAME=START:STOP:*FACTOR     START, START*FACTOR, ... up to STOP
+    '''
+    name                 = get_sweep_name(spec)
+    _, separator, values = spec.partition(ASSIGNMENT_SEPARATOR)
+    if separator == '' or name == '' or values == '':
+        raise ValueError('expected NAME=VALUES, got {!r}'.format(spec))
+
+    # ranges
+    if RANGE_SEPARATOR in values:
+        bounds = values.split(RANGE_SEPARATOR)
+        if len(bounds) not in [2, 3]:
+            raise ValueError('expected START:STOP[:STEP], got {!r}'.format(values))
+
+        start = value_type(bounds[0])
+        stop  = value_type(bounds[1])
+
+        if len(bounds) == 3 and bounds[2].startswith(GEOMETRIC_PREFIX):
+            factor = float(bounds[2][len(GEOMETRIC_PREFIX):])
+            return name, make_geometric_range(start, stop, factor, value_type)
+
+        step = value_type(bounds[2]) if len(bounds) == 3 else value_type(1)
+        return name, make_arithmetic_range(start, stop, step)
+
+    # lists
+    return name, [value_type(value) for value in values.split(LIST_SEPARATOR)]
+
+def make_points(sweeps):
+    '''
+    Make every combination of the values of sweeps, given as (name, values)
+    pairs, as a list of dicts.
+    '''
+    names = [name for name, values in sweeps]
+    return [dict(zip(names, values)) for values in itertools.product(*[values for name, values in sweeps])]
+
+def make_sweep(recipe, points, seed, count, out_dir, jobs):
+    '''
+    Make count instances of a recipe at each point, a dict of parameters that
+    override the recipe's, in out_dir, using jobs processes. Instances are
+    numbered across all points, and seeded by their numbers. Yields a manifest
+    record for each instance, in order.
+    '''
+    os.makedirs(out_dir, exist_ok=True)
+
+    total = len(points) * count
+    tasks = (
+        Task(
+            recipe = recipe._replace(parameters=dict(recipe.parameters, **point)),
+            index  = p * count + i,
+            seed   = instance_seed(seed, p * count + i),
+            path   = os.path.join(out_dir, get_file_name(recipe, p * count + i, total)),
+            point  = point,
+        )
+        for p, point in enumerate(points)
+        for i in range(count)
+    )
+
+    yield from run_tasks(make_instance, tasks, jobs)
+
+def make_variants(ast, transformation, seed, count, out_dir, jobs):
+    '''
+    Make count variants of ast, by running the stages of a transformation
+    over copies of it, in out_dir, using jobs processes. Each variant's stages
+    get their own RNG, seeded from the seed and the variant's number. Yields a
+    manifest record for each variant, in order.
+    '''
+    os.makedirs(out_dir, exist_ok=True)
+
+    tasks = (
+        VariantTask(
+            transformation = transformation,
+            index          = i,
+            seed           = instance_seed(seed, i),
+            path           = os.path.join(out_dir, get_file_name(transformation, i, count)),
+        )
+        for i in range(count)
+    )
+
+    data = pickle.dumps(ast, pickle.HIGHEST_PROTOCOL)
+    yield from run_tasks(make_variant, tasks, jobs, set_seed_problem, (data,))
+
+def write_manifest(records, out_dir):
+    '''
+    Write manifest records to the manifest in out_dir, one JSON object per
+    line, as they come.
+    '''
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    with open(manifest_path, 'w') as manifest:
+        for record in records:
+            print(json.dumps(record, sort_keys=True), file=manifest)
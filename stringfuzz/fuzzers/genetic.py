@@ -1,33 +1,129 @@
-import random
 import os
-import sys
-import subprocess
-import threading
-import datetime
-import signal
-import statistics
+import json
+import random
+import hashlib
 
 from heapq import heappush, heappop
+from collections import OrderedDict
 
 from stringfuzz.transformers import fuzz, graft
 from stringfuzz.generators import random_ast
 from stringfuzz.generator import generate
 from stringfuzz.ast import AssertNode, CheckSatNode
 from stringfuzz.util import coin_toss
+from stringfuzz.fuzzers.solvers import SolverPool
 
 __all__ = [
     'simulate'
 ]
 
 # constants
-DEFAULT_MUTATION_ROUNDS = 4
-DEFAULT_TIMEOUT         = 5
-MAX_NUM_ASSERTS         = 20
-NUM_RUNS                = 8
-
-# globals
-_language = None
-_timeout  = DEFAULT_TIMEOUT
+DEFAULT_MUTATION_ROUNDS    = 4
+DEFAULT_TIMEOUT            = 5
+DEFAULT_FITNESS_CACHE_SIZE = 10000
+MAX_NUM_ASSERTS            = 20
+NUM_RUNS                   = 8
+
+# data structures
+class World(object):
+    '''
+    Configuration for one simulation.
+    '''
+
+    def __init__(self, language, saint_peter, rng, solvers, fitness, timeout=DEFAULT_TIMEOUT):
+        self.language    = language
+        self.saint_peter = saint_peter
+        self.rng         = rng
+        self.solvers     = solvers
+        self.fitness     = fitness
+        self.timeout     = timeout
+        self.texts       = TextCache(language)
+
+class TextCache(object):
+    '''
+    The encoded problem text of each living organism, so that organisms are
+    only generated once, however many runs and generations they're judged in.
+    '''
+
+    # NOTE:
+    #      organisms are looked up by identity, which is only sound because
+    #      mutations make new lists of commands instead of changing them in
+    #      place; entries hold on to their organism so that its id can't be
+    #      reused while it's cached
+    def __init__(self, language):
+        self.language = language
+        self.entries  = {}
+
+    def get(self, organism):
+        entry = self.entries.get(id(organism))
+        if entry is None:
+            entry = (organism, generate(organism, self.language).encode())
+            self.entries[id(organism)] = entry
+        return entry[1]
+
+    def keep(self, population):
+        '''
+        Forget the texts of organisms that aren't in population.
+        '''
+        alive        = set(id(organism) for organism in population)
+        self.entries = {key: entry for key, entry in self.entries.items() if key in alive}
+
+class FitnessCache(object):
+    '''
+    The scores of the most recently judged problems, at most size of them,
+    keyed by a hash of each problem's text and the solver command and timeout
+    it was judged with. If path is given, scores are loaded from it, and saved
+    back to it.
+    '''
+
+    # NOTE:
+    #      a problem's score is the median of its first NUM_RUNS runs; later
+    #      generations reuse it instead of measuring it again
+    def __init__(self, size=DEFAULT_FITNESS_CACHE_SIZE, path=None):
+        self.size    = size
+        self.path    = path
+        self.entries = OrderedDict()
+
+        if path is not None and os.path.isfile(path):
+            with open(path) as file:
+                for key, score in json.load(file):
+                    self.put(key, score)
+
+    def make_key(self, text, command, timeout):
+        digest = hashlib.sha256()
+        digest.update(json.dumps([command, timeout]).encode())
+        digest.update(b'\0')
+        digest.update(text)
+        return digest.hexdigest()
+
+    def get(self, key):
+        '''
+        Get the score with key, or None if there isn't one.
+        '''
+        if key not in self.entries:
+            return None
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, key, score):
+        self.entries[key] = score
+        self.entries.move_to_end(key)
+
+        # forget the least recently used scores
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def save(self):
+        '''
+        Write the scores to path, least recently used first, if there's a path.
+        '''
+        if self.path is None:
+            return
+
+        temporary_path = self.path + '.tmp'
+        with open(temporary_path, 'w') as file:
+            json.dump(list(self.entries.items()), file)
+        os.replace(temporary_path, self.path)
 
 # helpers
 def mutate_fuzz(ast):
@@ -47,7 +143,7 @@ def decompose(ast):
             head.append(e)
     return head, asserts, tail
 
-def mutate_add(ast):
+def mutate_add(world, ast):
 
     if len(ast) >= MAX_NUM_ASSERTS:
         return ast
@@ -64,7 +160,8 @@ def mutate_add(ast):
         max_str_lit_length  = 10,
         max_int_lit         = 30,
         literal_probability = 0.5,
-        semantically_valid  = True
+        semantically_valid  = True,
+        rng                 = world.rng
     )
 
     # isolate just the new assert
@@ -81,8 +178,8 @@ def mutate_graft(ast):
     return ast
     # return graft(ast, skip_str_to_re=False)
 
-def mutate(ast):
-    choice = random.randint(1, 4)
+def mutate(world, ast):
+    choice = world.rng.randint(1, 4)
 
     if choice == 1:
         return mutate_fuzz(ast)
@@ -91,140 +188,65 @@ def mutate(ast):
         return mutate_pop(ast)
 
     if choice == 3:
-        return mutate_add(ast)
+        return mutate_add(world, ast)
 
     if choice == 4:
         return mutate_graft(ast)
 
-def vegetative_mate(parent, num_mutation_rounds=DEFAULT_MUTATION_ROUNDS):
+def vegetative_mate(world, parent, num_mutation_rounds=DEFAULT_MUTATION_ROUNDS):
     child = parent
     for i in range(num_mutation_rounds):
-        child = mutate(child)
+        child = mutate(world, child)
     return child
 
-def mate(parents):
-    return vegetative_mate(random.choice(parents))
-
-def time_solver(command, problem, timeout, verbose=False, debug=False):
-
-    # print command that will be run
-    if verbose is True or debug is True:
-        print('RUNNING:', repr(command), file=sys.stderr)
-
-    # get start time
-    start = datetime.datetime.now().timestamp()
-
-    # run command
-    process = subprocess.Popen(
-        command,
-        shell              = True,
-        stdin              = subprocess.PIPE,
-        stdout             = subprocess.PIPE,
-        stderr             = subprocess.PIPE,
-        preexec_fn         = os.setsid,
-        universal_newlines = True
-    )
-
-    # feed it the problem and wait for it to complete
-    try:
-        stdout, stderr = process.communicate(input=problem, timeout=timeout)
-
-    # if it times out ...
-    except subprocess.TimeoutExpired as e:
-
-        # if verbose is True:
-        print('TIMED OUT:', repr(command), '... killing', process.pid, file=sys.stderr)
-
-        # kill it
-        os.killpg(os.getpgid(process.pid), signal.SIGINT)
-
-        # set timeout result
-        elapsed = timeout
-
-        # print output
-        # if verbose is True:
-        print('STDOUT:', process.stdout.read(), file=sys.stderr, end='')
-        print('STDERR:', process.stderr.read(), file=sys.stderr, end='')
-
-    # if it completes in time ...
-    else:
-
-        # measure run time
-        end     = datetime.datetime.now().timestamp()
-        elapsed = end - start
+def mate(world, parents):
+    return vegetative_mate(world, world.rng.choice(parents))
 
-        if stderr != '':
-            print('STDERR IS NOT EMPTY!:', stderr, file=sys.stderr, end='')
-            print('PROBLEM: \n', problem, file=sys.stderr, end='')
-
-        # print output
-        if debug is True:
-            print('STDOUT:', stdout, file=sys.stderr, end='')
-            print('STDERR:', stderr, file=sys.stderr, end='')
-
-    return elapsed
-
-def reproduce(survivors, world_size):
+def reproduce(world, survivors, world_size):
 
     # create offspring
     num_offspring = world_size - len(survivors)
-    offspring     = [mate(survivors) for i in range(num_offspring)]
+    offspring     = [mate(world, survivors) for i in range(num_offspring)]
 
     # return new population
     new_population = survivors + offspring
     return new_population
 
-def generate_problem(problem):
-    global _language
-    return generate(problem, _language)
-
 def normalise(bottom, top, value):
     width = top - bottom
     return value / width
 
-def time_in_thread(index, times, **kwargs):
-    time         = time_solver(**kwargs)
-    times[index] = time
-
-def get_score(organism, saint_peter):
-    global _timeout
-
-    # get average run time
-    times   = [0 for i in range(NUM_RUNS)]
-    threads = []
-    for i in range(NUM_RUNS):
-        thread = threading.Thread(
-            target = time_in_thread,
-            args   = (i, times),
-            kwargs = {
-                'command': saint_peter,
-                'timeout': _timeout,
-                'problem': generate_problem(organism)
-            }
-        )
-        threads.append(thread)
-
-    # run experiments in parallel
-    for thread in threads:
-        thread.start()
-
-    for thread in threads:
-        thread.join()
-
-    # return median run time
-    score = statistics.median(times)
-    return score
-
-def judge(population, saint_peter):
-    for organism in population:
-        yield get_score(organism, saint_peter)
-
-def cull(population, scores):
+def judge(world, population):
+
+    texts = [world.texts.get(organism) for organism in population]
+    keys  = [world.fitness.make_key(text, world.saint_peter, world.timeout) for text in texts]
+
+    # only judge problems that haven't been judged before, and clones once
+    known    = {}
+    unjudged = OrderedDict()
+    for key, text in zip(keys, texts):
+        if key in known or key in unjudged:
+            continue
+
+        score = world.fitness.get(key)
+        if score is None:
+            unjudged[key] = text
+        else:
+            known[key] = score
+
+    # time every run of every new problem at once, and score each by its median
+    scores = world.solvers.score(list(unjudged.values()), NUM_RUNS)
+    for key, score in zip(unjudged, scores):
+        known[key] = score
+        world.fitness.put(key, score)
+
+    return [known[key] for key in keys]
+
+def cull(world, population, scores):
 
     # annotate specimens with their scores
-    global _timeout
     indices   = range(len(population))
-    annotated = zip([(_timeout - s) for s in scores], indices)
+    annotated = zip([(world.timeout - s) for s in scores], indices)
 
     # create a min-heap out of annotated specimens
     heap = []
@@ -246,12 +268,7 @@ def cull(population, scores):
 def time_to_log(generation, resolution):
     return (generation % resolution) == 0
 
-# public API
-def simulate(progenitor, language, saint_peter, num_generations, world_size, log_resolution):
-
-    # set global config
-    global _language
-    _language = language
+def run_simulation(progenitor, world, num_generations, world_size, log_resolution):
 
     # create initial population
     population = [progenitor]
@@ -267,13 +284,24 @@ def simulate(progenitor, language, saint_peter, num_generations, world_size, log
         assert len(population) > 0
 
         # populate world
-        population = reproduce(population, world_size)
+        population = reproduce(world, population, world_size)
 
         # measure performance of each organism
-        scores = judge(population, saint_peter)
+        scores = judge(world, population)
 
         # keep only the "best" organisms
-        population = cull(population, scores)
+        population = cull(world, population, scores)
+        world.texts.keep(population)
 
     # return final population
     return population
+
+# public API
+def simulate(progenitor, language, saint_peter, num_generations, world_size, log_resolution, rng=random, jobs=None, fitness_cache=None, fitness_cache_size=DEFAULT_FITNESS_CACHE_SIZE):
+    fitness = FitnessCache(fitness_cache_size, fitness_cache)
+    try:
+        with SolverPool(saint_peter, DEFAULT_TIMEOUT, jobs) as solvers:
+            world = World(language, saint_peter, rng, solvers, fitness)
+            return run_simulation(progenitor, world, num_generations, world_size, log_resolution)
+    finally:
+        fitness.save()
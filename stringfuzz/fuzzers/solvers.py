@@ -0,0 +1,185 @@
+'''
+Running solvers on many problems at once.
+
+A SolverPool runs a solver command on problems in a bounded number of slots,
+by default one for each CPU that this process may run on. Each slot belongs to
+one CPU, and solvers started in a slot are pinned to its CPU where the platform
+allows, so that concurrent runs don't compete for the same core and skew each
+other's times. Runs are handed out to free slots as soon as they're submitted,
+so timing a whole generation takes about as long as its slowest runs, rather
+than as long as all of its runs put together.
+'''
+
+import os
+import sys
+import queue
+import shutil
+import signal
+import datetime
+import statistics
+import subprocess
+
+from concurrent.futures import ThreadPoolExecutor
+
+__all__ = [
+    'SolverPool',
+    'time_solver',
+    'get_cpus',
+]
+
+# constants
+SHELL   = '/bin/sh'
+TASKSET = shutil.which('taskset')
+
+# data structures
+class SolverPool(object):
+    '''
+    Runs command on problems, encoded SMT text fed on standard input, in jobs
+    slots at once, killing runs that take longer than timeout seconds.
+    '''
+
+    def __init__(self, command, timeout, jobs=None, verbose=False, debug=False):
+        cpus = get_cpus()
+        if jobs is None:
+            jobs = len(cpus)
+
+        self.command = command
+        self.timeout = timeout
+        self.verbose = verbose
+        self.debug   = debug
+
+        # NOTE:
+        #      the workers only wait on solvers, so threads are enough; with
+        #      more jobs than CPUs, CPUs are shared out among the slots in turn
+        self.executor   = ThreadPoolExecutor(max_workers=jobs)
+        self.free_slots = queue.Queue()
+        for i in range(jobs):
+            self.free_slots.put(cpus[i % len(cpus)])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def run(self, problem):
+        '''
+        Time one run of the solver on problem, in the first free slot.
+        '''
+        cpu = self.free_slots.get()
+        try:
+            return time_solver(self.command, problem, self.timeout, cpu=cpu, verbose=self.verbose, debug=self.debug)
+        finally:
+            self.free_slots.put(cpu)
+
+    def score(self, problems, num_runs):
+        '''
+        Run the solver num_runs times on each problem, all at once, and get
+        the median run time of each problem, in order.
+        '''
+        futures = [[self.executor.submit(self.run, problem) for i in range(num_runs)] for problem in problems]
+        return [statistics.median(future.result() for future in runs) for runs in futures]
+
+    def close(self):
+        self.executor.shutdown()
+
+# helpers
+def decode(output):
+    return output.decode(errors='replace')
+
+def get_cpus():
+    '''
+    Get the CPUs that this process may run on.
+    '''
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+# NOTE:
+#      solvers are started from worker threads, where running Python code
+#      between fork and exec (preexec_fn) can deadlock the child; so they're
+#      pinned by taskset before the shell starts, or failing that, by pinning
+#      the shell from here as soon as it's started, which is best-effort: a
+#      shell that forks before it's pinned has an unpinned child
+def get_arguments(command, cpu):
+    '''
+    Get the arguments that run command in a shell, pinned to cpu by taskset if
+    cpu is given and taskset is available.
+    '''
+    if cpu is not None and TASKSET is not None:
+        return [TASKSET, '--cpu-list', str(cpu), SHELL, '-c', command]
+    return [SHELL, '-c', command]
+
+def pin_process(process, cpu):
+    if cpu is None or TASKSET is not None or not hasattr(os, 'sched_setaffinity'):
+        return
+    try:
+        os.sched_setaffinity(process.pid, {cpu})
+
+    # it may have finished already
+    except ProcessLookupError:
+        pass
+
+# public API
+def time_solver(command, problem, timeout, cpu=None, verbose=False, debug=False):
+    '''
+    Run command on problem, encoded SMT text, pinned to cpu if it's given,
+    and get how long it took in seconds, or timeout if it took too long.
+    '''
+
+    # print command that will be run
+    if verbose is True or debug is True:
+        print('RUNNING:', repr(command), file=sys.stderr)
+
+    # get start time
+    start = datetime.datetime.now().timestamp()
+
+    # run command
+    process = subprocess.Popen(
+        get_arguments(command, cpu),
+        stdin             = subprocess.PIPE,
+        stdout            = subprocess.PIPE,
+        stderr            = subprocess.PIPE,
+        start_new_session = True
+    )
+    pin_process(process, cpu)
+
+    # feed it the problem and wait for it to complete
+    try:
+        stdout, stderr = process.communicate(input=problem, timeout=timeout)
+
+    # if it times out ...
+    except subprocess.TimeoutExpired as e:
+
+        # if verbose is True:
+        print('TIMED OUT:', repr(command), '... killing', process.pid, file=sys.stderr)
+
+        # kill it
+        os.killpg(os.getpgid(process.pid), signal.SIGINT)
+
+        # set timeout result
+        elapsed = timeout
+
+        # print output
+        # if verbose is True:
+        stdout, stderr = process.communicate()
+        print('STDOUT:', decode(stdout), file=sys.stderr, end='')
+        print('STDERR:', decode(stderr), file=sys.stderr, end='')
+
+    # if it completes in time ...
+    else:
+
+        # measure run time
+        end     = datetime.datetime.now().timestamp()
+        elapsed = end - start
+
+        if stderr != b'':
+            print('STDERR IS NOT EMPTY!:', decode(stderr), file=sys.stderr, end='')
+            print('PROBLEM: \n', decode(problem), file=sys.stderr, end='')
+
+        # print output
+        if debug is True:
+            print('STDOUT:', decode(stdout), file=sys.stderr, end='')
+            print('STDERR:', decode(stderr), file=sys.stderr, end='')
+
+    return elapsed
@@ -1,21 +1,48 @@
 import re
 
-from stringfuzz.constants import SMT_20, SMT_20_STRING, SMT_25_STRING
+from stringfuzz.constants import LANGUAGES, SMT_20, SMT_20_STRING, SMT_25_STRING
 from stringfuzz.scanner import scan, ALPHABET, WHITESPACE
 from stringfuzz.ast import *
 
 __all__ = [
     'generate',
     'generate_file',
+    'generate_stream',
     'NotSupported',
 ]
 
+# constants
+# NOTE:
+#      safe characters are the ones that encode_char leaves alone in every
+#      language; literals made only of them can be emitted verbatim
+SAFE_CHARS     = ''.join(c for c in ALPHABET if c not in '"\\')
+UNSAFE_PATTERN = re.compile('[^{}]'.format(re.escape(SAFE_CHARS)))
+
 # exceptions
 class NotSupported(ValueError):
     def __init__(self, e, language):
         message = 'can\'t generate {!r} in language {!r}'.format(e, language)
         super().__init__(message)
 
+# data structures
+class EncodingTable(dict):
+    '''
+    A str.translate table that maps code points to their encodings in one
+    language. Code points outside the prefilled range are encoded on first
+    use and cached.
+    '''
+
+    def __init__(self, language, prefill=range(256)):
+        super().__init__()
+        self.language = language
+        for code in prefill:
+            self[code] = encode_char(chr(code), language)
+
+    def __missing__(self, code):
+        encoded    = encode_char(chr(code), self.language)
+        self[code] = encoded
+        return encoded
+
 # functions
 def needs_encoding(c):
     return c not in ALPHABET
@@ -34,8 +61,16 @@ def encode_char(c, language):
         return '\\x{:0>2x}'.format(ord(c))
     return c
 
+# tables
+ENCODING_TABLES = {language: EncodingTable(language) for language in LANGUAGES}
+
 def encode_string(s, language):
-    encoded = ''.join(encode_char(c, language) for c in s)
+
+    # fast path: nothing to escape
+    if UNSAFE_PATTERN.search(s) is None:
+        return '"' + s + '"'
+
+    encoded = s.translate(ENCODING_TABLES[language])
     return '"' + encoded + '"'
 
 def generate_node(node, language):
@@ -45,7 +80,7 @@ def generate_node(node, language):
         return generate_expr(node, language)
 
     if isinstance(node, SortedVarNode):
-        return '({} {})'.format(generate_node(node.name, language), generate_node(node.sort, language))
+        return '({} {})'.format(generate_node(node.var_name, language), generate_node(node.var_sort, language))
 
     if isinstance(node, LiteralNode):
         return generate_lit(node, language)
@@ -57,7 +92,7 @@ def generate_node(node, language):
         return node.name
 
     if isinstance(node, CompoundSortNode):
-        return '({} {})'.format(generate_node(node.symbol, language), ' '.join(generate_node(s, language) for s in node.sorts))
+        return '({} {})'.format(generate_node(node.constructor, language), ' '.join(generate_node(s, language) for s in node.sorts))
 
     if isinstance(node, BracketsNode):
         return '({})'.format(' '.join(generate_node(s, language) for s in node.body))
@@ -94,172 +129,195 @@ def generate_lit(lit, language):
 
     raise NotImplementedError('unknown literal type {!r}'.format(lit))
 
-def generate_expr(e, language):
-    components = []
+def generate_symbol(e, language):
 
     # special expressions
     if isinstance(e, ConcatNode):
         if language == SMT_20_STRING:
-            components.append('Concat')
+            return 'Concat'
         elif language == SMT_25_STRING:
-            components.append('str.++')
+            return 'str.++'
         else:
             raise NotSupported(e, language)
 
     elif isinstance(e, ContainsNode):
         if language == SMT_20_STRING:
-            components.append('Contains')
+            return 'Contains'
         elif language == SMT_25_STRING:
-            components.append('str.contains')
+            return 'str.contains'
         else:
             raise NotSupported(e, language)
 
     elif isinstance(e, AtNode):
         if language == SMT_20_STRING:
-            components.append('CharAt')
+            return 'CharAt'
         elif language == SMT_25_STRING:
-            components.append('str.at')
+            return 'str.at'
         else:
             raise NotSupported(e, language)
 
     elif isinstance(e, LengthNode):
         if language == SMT_20_STRING:
-            components.append('Length')
+            return 'Length'
         elif language == SMT_25_STRING:
-            components.append('str.len')
+            return 'str.len'
         else:
             raise NotSupported(e, language)
 
     elif isinstance(e, IndexOfNode):
         if language == SMT_20_STRING:
-            components.append('IndexOf')
+            return 'IndexOf'
         elif language == SMT_25_STRING:
-            components.append('str.indexof')
+            return 'str.indexof'
         else:
             raise NotSupported(e, language)
 
     elif isinstance(e, IndexOf2Node):
         if language == SMT_20_STRING:
-            components.append('IndexOf2')
+            return 'IndexOf2'
         elif language == SMT_25_STRING:
-            components.append('str.indexof')
+            return 'str.indexof'
         else:
             raise NotSupported(e, language)
 
     elif isinstance(e, PrefixOfNode):
         if language == SMT_20_STRING:
-            components.append('StartsWith')
+            return 'StartsWith'
         elif language == SMT_25_STRING:
-            components.append('str.prefixof')
+            return 'str.prefixof'
         else:
             raise NotSupported(e, language)
 
     elif isinstance(e, SuffixOfNode):
         if language == SMT_20_STRING:
-            components.append('EndsWith')
+            return 'EndsWith'
         elif language == SMT_25_STRING:
-            components.append('str.suffixof')
+            return 'str.suffixof'
         else:
             raise NotSupported(e, language)
 
     elif isinstance(e, StringReplaceNode):
         if language == SMT_20_STRING:
-            components.append('Replace')
+            return 'Replace'
         elif language == SMT_25_STRING:
-            components.append('str.replace')
+            return 'str.replace'
         else:
             raise NotSupported(e, language)
 
     elif isinstance(e, SubstringNode):
         if language == SMT_20_STRING:
-            components.append('Substring')
+            return 'Substring'
         elif language == SMT_25_STRING:
-            components.append('str.substr')
+            return 'str.substr'
         else:
             raise NotSupported(e, language)
 
     elif isinstance(e, FromIntNode):
         if language == SMT_25_STRING:
-            components.append('str.from.int')
+            return 'str.from.int'
         else:
             raise NotSupported(e, language)
 
     elif isinstance(e, ToIntNode):
         if language == SMT_25_STRING:
-            components.append('str.to.int')
+            return 'str.to.int'
         else:
             raise NotSupported(e, language)
 
     elif isinstance(e, StrToReNode):
         if language == SMT_20_STRING:
-            components.append('Str2Reg')
+            return 'Str2Reg'
         elif language == SMT_25_STRING:
-            components.append('str.to.re')
+            return 'str.to.re'
         else:
             raise NotSupported(e, language)
 
     elif isinstance(e, InReNode):
         if language == SMT_20_STRING:
-            components.append('RegexIn')
+            return 'RegexIn'
         elif language == SMT_25_STRING:
-            components.append('str.in.re')
+            return 'str.in.re'
         else:
             raise NotSupported(e, language)
 
     elif isinstance(e, ReConcatNode):
         if language == SMT_20_STRING:
-            components.append('RegexConcat')
+            return 'RegexConcat'
         elif language == SMT_25_STRING:
-            components.append('re.++')
+            return 're.++'
         else:
             raise NotSupported(e, language)
 
     elif isinstance(e, ReStarNode):
         if language == SMT_20_STRING:
-            components.append('RegexStar')
+            return 'RegexStar'
         elif language == SMT_25_STRING:
-            components.append('re.*')
+            return 're.*'
         else:
             raise NotSupported(e, language)
 
     elif isinstance(e, RePlusNode):
         if language == SMT_20_STRING:
-            components.append('RegexPlus')
+            return 'RegexPlus'
         elif language == SMT_25_STRING:
-            components.append('re.+')
+            return 're.+'
         else:
             raise NotSupported(e, language)
 
     elif isinstance(e, ReRangeNode):
         if language == SMT_20_STRING:
-            components.append('RegexCharRange')
+            return 'RegexCharRange'
         elif language == SMT_25_STRING:
-            components.append('re.range')
+            return 're.range'
         else:
             raise NotSupported(e, language)
 
     elif isinstance(e, ReUnionNode):
         if language == SMT_20_STRING:
-            components.append('RegexUnion')
+            return 'RegexUnion'
         elif language == SMT_25_STRING:
-            components.append('re.union')
+            return 're.union'
         else:
             raise NotSupported(e, language)
 
     elif isinstance(e, ReInterNode):
         if language == SMT_25_STRING:
-            components.append('re.inter')
+            return 're.inter'
         else:
             raise NotSupported(e, language)
 
     # all other expressions
-    else:
-        components.append(generate_node(e.symbol, language))
+    return generate_node(e.symbol, language)
 
-    # generate args
-    components.extend(generate_node(n, language) for n in e.body)
+def generate_expr(e, language):
+
+    # NOTE:
+    #      expressions are generated with an explicit stack instead of
+    #      recursion, so that arbitrarily deep expressions can be generated;
+    #      the stack holds expressions still to be generated, and strings,
+    #      which are output as they are
+    pieces = []
+    stack  = [e]
+    while len(stack) > 0:
+        node = stack.pop()
+
+        if isinstance(node, str):
+            pieces.append(node)
+
+        elif isinstance(node, ExpressionNode):
+            pieces.append('(')
+            pieces.append(generate_symbol(node, language))
+
+            # push args in reverse, each preceded by a space
+            stack.append(')')
+            for arg in reversed(list(node.body)):
+                stack.append(arg)
+                stack.append(' ')
 
-    return '({})'.format(' '.join(components))
+        else:
+            pieces.append(generate_node(node, language))
+
+    return ''.join(pieces)
 
 # public API
 def generate_file(ast, language, path):
@@ -268,3 +326,12 @@ def generate_file(ast, language, path):
 
 def generate(ast, language):
     return '\n'.join(generate_node(e, language) for e in ast)
+
+def generate_stream(ast, language, stream):
+    '''
+    Write the same text as generate to a stream, one command at a time.
+    '''
+    for i, e in enumerate(ast):
+        if i > 0:
+            stream.write('\n')
+        stream.write(generate_node(e, language))
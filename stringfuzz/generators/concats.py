@@ -2,6 +2,7 @@ import random
 
 from stringfuzz.scanner import ALPHABET
 from stringfuzz.smt import *
+from stringfuzz.util import join_terms_with
 
 __all__ = [
     'concats',
@@ -42,48 +43,50 @@ def make_semantic_concats(depth, balanced):
 
     return variables, [], expressions
 
-def make_syntactic_concats(depth, balanced):
-
-    def concats_helper(depth, balanced):
-
-        # base case
-        if depth < 1:
-            new_var = smt_new_var()
-            return [new_var], new_var
+def make_concat_leaves(num_leaves, counters):
 
-        # make right side
-        right_vars, right_expr = concats_helper(depth - 1, balanced)
+    # NOTE:
+    #      leaves are numbered from right to left, so that their names are the
+    #      same as when concats were built recursively, right side first
+    leaves = [smt_new_var(counters) for i in range(num_leaves)]
+    leaves.reverse()
+    return leaves
 
-        # make left side
-        if balanced is True:
-            left_vars, left_expr = concats_helper(depth - 1, balanced)
-        else:
-            left_vars, left_expr = concats_helper(0, balanced)
+def make_balanced_concat(leaves):
 
-        # build return value
-        all_vars = left_vars + right_vars
-        concat   = smt_concat(left_expr, right_expr)
+    # pair up adjacent terms, one level at a time
+    level = leaves
+    while len(level) > 1:
+        level = [smt_concat(level[i], level[i + 1]) for i in range(0, len(level), 2)]
 
-        return all_vars, concat
+    return level[0]
 
-    # make first variable
-    first_var = smt_new_var()
+def make_syntactic_concats(depth, balanced):
 
     # create return values
+    counters    = Counters()
+    first_var   = smt_new_var(counters)
     variables   = [first_var]
     constants   = []
     expressions = []
 
     # make deep concat
     if depth > 0:
-        concat_variables, concat_expr = concats_helper(depth, balanced)
 
-        variables  += concat_variables
-        expressions = [set_equal(first_var, concat_expr)]
+        # a balanced tree has a leaf per path, and an unbalanced one has a leaf per level
+        if balanced is True:
+            leaves = make_concat_leaves(2 ** depth, counters)
+            concat = make_balanced_concat(leaves)
+        else:
+            leaves = make_concat_leaves(depth + 1, counters)
+            concat = join_terms_with(leaves, smt_concat)
+
+        variables  += leaves
+        expressions = [set_equal(first_var, concat)]
 
     return variables, constants, expressions
 
-def make_concats(depth, depth_type, solution, balanced, num_extracts, max_extract_index):
+def make_concats(depth, depth_type, solution, balanced, num_extracts, max_extract_index, rng=random):
 
     # generate concats
     if depth_type == SEMANTIC_DEPTH:
@@ -116,15 +119,15 @@ def make_concats(depth, depth_type, solution, balanced, num_extracts, max_extrac
 
         # shuffle indices in model
         for indices in extract_model.values():
-            random.shuffle(indices)
+            rng.shuffle(indices)
 
         # create the extracts
         for i in range(num_extracts):
 
             # randomly pick a variable and a char to extract from it
-            var_index = random.randrange(len(remaining_vars))
+            var_index = rng.randrange(len(remaining_vars))
             var       = remaining_vars[var_index]
-            char      = smt_str_lit(random.choice(ALPHABET))
+            char      = smt_str_lit(rng.choice(ALPHABET))
 
             # pop the first index from which to extract, without replacement
             index = smt_int_lit(extract_model[var].pop())
@@ -149,5 +152,4 @@ def make_concats(depth, depth_type, solution, balanced, num_extracts, max_extrac
 
 # public API
 def concats(*args, **kwargs):
-    smt_reset_counters()
     return make_concats(*args, **kwargs)
@@ -8,15 +8,15 @@ __all__ = [
     'equality',
 ]
 
-def get_length(max_length, randomise):
+def get_length(max_length, randomise, rng):
     if randomise is False:
         return max_length
-    return random.randint(0, max_length)
+    return rng.randint(0, max_length)
 
-def randomly_add_infix(probability):
-    return random.random() < probability
+def randomly_add_infix(probability, rng):
+    return rng.random() < probability
 
-def make_equality(num_expressions, num_terms, prefix_length, suffix_length, add_infixes, infix_length, randomise_lengths, infix_probability):
+def make_equality(num_expressions, num_terms, prefix_length, suffix_length, add_infixes, infix_length, randomise_lengths, infix_probability, rng=random):
 
     # check args
     if num_expressions < 1:
@@ -31,17 +31,18 @@ def make_equality(num_expressions, num_terms, prefix_length, suffix_length, add_
     # result values
     expressions = []
     variables   = []
+    counters    = Counters()
 
     # create root variable
-    root = smt_new_var()
+    root = smt_new_var(counters)
     variables.append(root)
 
     # create expressions
     for i in range(num_expressions):
 
         # prefix and suffix
-        prefix = smt_str_lit(random_string(get_length(prefix_length, randomise_lengths)))
-        suffix = smt_str_lit(random_string(get_length(suffix_length, randomise_lengths)))
+        prefix = smt_str_lit(random_string(get_length(prefix_length, randomise_lengths, rng), rng))
+        suffix = smt_str_lit(random_string(get_length(suffix_length, randomise_lengths, rng), rng))
 
         # keep track of new variables
         new_variables = []
@@ -51,12 +52,12 @@ def make_equality(num_expressions, num_terms, prefix_length, suffix_length, add_
         for i in range(num_terms - 2):
 
             # if infixes are enabled, add them with the given probability
-            if add_infixes is True and randomly_add_infix(infix_probability) is True:
-                new_term = smt_str_lit(random_string(get_length(infix_length, randomise_lengths)))
+            if add_infixes is True and randomly_add_infix(infix_probability, rng) is True:
+                new_term = smt_str_lit(random_string(get_length(infix_length, randomise_lengths, rng), rng))
 
             # otherwise, just add variables
             else:
-                new_term = smt_new_var()
+                new_term = smt_new_var(counters)
                 new_variables.append(new_term)
 
             middle.append(new_term)
@@ -82,5 +83,4 @@ def make_equality(num_expressions, num_terms, prefix_length, suffix_length, add_
 
 # public API
 def equality(*args, **kwargs):
-    smt_reset_counters()
     return make_equality(*args, **kwargs)
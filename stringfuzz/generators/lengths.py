@@ -12,28 +12,29 @@ __all__ = [
 Variable = namedtuple('Variable', ['length'])
 
 # functions
-def new_model(min_length, max_length):
-    length = random.randint(min_length, max_length)
+def new_model(min_length, max_length, rng):
+    length = rng.randint(min_length, max_length)
     return Variable(length)
 
 def set_equal(a, b):
     return smt_assert(smt_equal(a, b))
 
-def make_lengths(num_vars, min_length, max_length, num_concats, random_relations):
+def make_lengths(num_vars, min_length, max_length, num_concats, random_relations, rng=random):
 
     # make list of possible relations to use in constraints
     if random_relations is True:
         def choose_relation():
-            return random.choice([smt_equal, smt_gt, smt_lt])
+            return rng.choice([smt_equal, smt_gt, smt_lt])
     else:
         def choose_relation():
             return smt_equal
 
     # create variables
-    variables = [smt_new_var() for i in range(num_vars)]
+    counters  = Counters()
+    variables = [smt_new_var(counters) for i in range(num_vars)]
 
     # create model
-    model = {v : new_model(min_length, max_length) for v in variables}
+    model = {v : new_model(min_length, max_length, rng) for v in variables}
 
     # create length constraints
     expressions = []
@@ -60,7 +61,7 @@ def make_lengths(num_vars, min_length, max_length, num_concats, random_relations
 
         # copy and shuffle variable list to use in concats
         unused_variables = list(variables)
-        random.shuffle(unused_variables)
+        rng.shuffle(unused_variables)
 
         # generate the concats
         for i in range(num_concats):
@@ -92,5 +93,4 @@ def make_lengths(num_vars, min_length, max_length, num_concats, random_relations
 
 # public API
 def lengths(*args, **kwargs):
-    smt_reset_counters()
     return make_lengths(*args, **kwargs)
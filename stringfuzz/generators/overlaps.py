@@ -8,18 +8,19 @@ __all__ = [
     'overlaps',
 ]
 
-def make_overlaps(num_vars, length_of_consts):
+def make_overlaps(num_vars, length_of_consts, rng=random):
 
     # check args
     if num_vars < 1:
         raise ValueError('the number of variables must be at least 1')
 
     # create constants
-    left  = smt_str_lit(random_string(length_of_consts))
-    right = smt_str_lit(random_string(length_of_consts))
+    left  = smt_str_lit(random_string(length_of_consts, rng))
+    right = smt_str_lit(random_string(length_of_consts, rng))
 
     # create middle variables
-    middle_vars = [smt_new_var() for i in range(num_vars)]
+    counters    = Counters()
+    middle_vars = [smt_new_var(counters) for i in range(num_vars)]
     middle      = join_terms_with(middle_vars, smt_concat)
 
     # create overlapping constraint
@@ -42,5 +43,4 @@ def make_overlaps(num_vars, length_of_consts):
 
 # public API
 def overlaps(*args, **kwargs):
-    smt_reset_counters()
     return make_overlaps(*args, **kwargs)
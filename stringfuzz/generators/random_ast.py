@@ -1,9 +1,16 @@
+import math
 import random
 import inspect
+import operator
+import functools
+import itertools
+import threading
+
+from collections import namedtuple
 
 from stringfuzz.ast import *
-from stringfuzz.smt import smt_new_var, smt_reset_counters, smt_declare_var
-from stringfuzz.util import random_string, coin_toss
+from stringfuzz.smt import smt_new_var, smt_declare_var, Counters
+from stringfuzz.util import random_strings
 
 __all__ = [
     'random_ast'
@@ -56,12 +63,38 @@ N_ARY_NONTERMINALS = [
 
 EXPRESSION_SORTS = DECLARABLE_SORTS + [REGEX_SORT]
 
-# global config
-_max_terms           = 0
-_max_str_lit_length  = 0
-_max_int_lit         = 0
-_literal_probability = 0.0
-_semantically_valid  = False
+# sized generation
+DEFAULT_SIZE_TOLERANCE = 0.1
+MAX_SIZED_ATTEMPTS     = 10000
+MIN_REJECTED_TOLERANCE = 0.05
+BISECTION_STEPS        = 50
+NEWTON_STEPS           = 100
+NEWTON_TOLERANCE       = 1e-12
+
+# data structures
+Production = namedtuple('Production', ('node', 'signature', 'num_args', 'takes_any'))
+Slot       = namedtuple('Slot', ('node', 'sort', 'first_arg', 'num_args'))
+Boltzmann  = namedtuple('Boltzmann', ('parameter', 'values', 'choices', 'cum_weights', 'sort_weights'))
+
+class RandomASTContext(object):
+    '''
+    Configuration and state for generating one random AST, including the
+    tables that are looked up for every node.
+    '''
+
+    def __init__(self, max_terms, max_str_lit_length, max_int_lit, literal_probability, semantically_valid, rng):
+        self.max_terms           = max_terms
+        self.max_str_lit_length  = max_str_lit_length
+        self.max_int_lit         = max_int_lit
+        self.literal_probability = literal_probability
+        self.semantically_valid  = semantically_valid
+        self.counters            = Counters()
+        self.rng                 = rng
+
+        # tables
+        self.productions     = make_productions(NONTERMINALS)
+        self.literal_weights = [literal_probability, 1.0 - literal_probability]
+        self.int_literals    = range(max_int_lit + 1)
 
 # helpers
 def get_all_returning_a(sort, nodes):
@@ -70,86 +103,528 @@ def get_all_returning_a(sort, nodes):
 def get_terminals(nodes):
     return filter(lambda node: node.is_terminal(), nodes)
 
-def make_random_literal(sort):
-    if sort == STRING_SORT:
-        return StringLitNode(random_string(_max_str_lit_length))
-
-    if sort == INT_SORT:
-        return IntLitNode(random.randint(0, _max_int_lit))
-
-    if sort == BOOL_SORT:
-        return BoolLitNode(coin_toss())
-
-    raise ValueError('unknown sort {}'.format(sort))
-
-def should_choose_literal():
-    global _literal_probability
-    return random.random() < _literal_probability
-
-def make_random_terminal(variables, sort):
-
-    if sort == REGEX_SORT:
-        return ReAllCharNode()
+def make_production(node):
+    signature = node.get_signature()
+    return Production(node, signature, len(signature), node.accepts(ANY_SORT))
 
-    # randomly choose between a variable or a literal
-    if should_choose_literal():
-        return make_random_literal(sort)
+def make_productions(nodes):
+    return {sort: [make_production(n) for n in get_all_returning_a(sort, nodes)] for sort in EXPRESSION_SORTS}
 
-    return random.choice(variables[sort])
+def group_indices(keys, indices):
+    groups = {}
+    for i in indices:
+        groups.setdefault(keys[i], []).append(i)
+    return groups
 
-def make_random_expression(variables, sort, depth):
-    global _semantically_valid
+def make_random_literals(context, sort, count):
+    rng = context.rng
 
-    # if semantics are going to hell, then randomly reinvent the sort
-    if _semantically_valid is False:
-        sort = random.choice(EXPRESSION_SORTS)
-
-    # at depth 0, make a terminal
-    if depth < 1:
-        return make_random_terminal(variables, sort)
-
-    # randomly shrink the depth
-    shrunken_depth = random.randint(0, depth - 1)
-
-    # get random expression generator
-    candidate_nodes = get_all_returning_a(sort, NONTERMINALS)
-    expression_node = random.choice(candidate_nodes)
-    signature       = expression_node.get_signature()
-    num_args        = len(signature)
-
-    # if the expression takes any sort, pick one
-    if expression_node.accepts(ANY_SORT):
-        collapsed_sort = random.choice(EXPRESSION_SORTS)
-        signature      = [collapsed_sort for i in range(num_args)]
-
-    # generate random arguments
-    random_args = [make_random_expression(variables, arg_sort, shrunken_depth) for arg_sort in signature]
-
-    # build expression
-    expression = expression_node(*random_args)
+    if sort == STRING_SORT:
+        return [StringLitNode(v) for v in random_strings(count, context.max_str_lit_length, rng)]
 
-    return expression
+    if sort == INT_SORT:
+        return [IntLitNode(v) for v in rng.choices(context.int_literals, k=count)]
 
-def generate_assert(variables, depth):
-    expression = make_random_expression(variables, BOOL_SORT, depth)
-    return AssertNode(expression)
+    if sort == BOOL_SORT:
+        return [BoolLitNode(v) for v in rng.choices([True, False], k=count)]
 
-def make_random_ast(num_vars, num_asserts, depth, max_terms, max_str_lit_length, max_int_lit, literal_probability, semantically_valid):
-    global _max_terms
-    global _max_str_lit_length
-    global _max_int_lit
-    global _literal_probability
-    global _semantically_valid
+    raise ValueError('unknown sort {}'.format(sort))
 
-    # set global config
-    _max_terms           = max_terms
-    _max_str_lit_length  = max_str_lit_length
-    _max_int_lit         = max_int_lit
-    _literal_probability = literal_probability
-    _semantically_valid  = semantically_valid
+def make_random_terminals(context, variables, sorts):
+    rng       = context.rng
+    terminals = [None] * len(sorts)
+
+    # regex terminals are always the same
+    others = []
+    for i, sort in enumerate(sorts):
+        if sort == REGEX_SORT:
+            terminals[i] = ReAllCharNode()
+        else:
+            others.append(i)
+
+    # randomly choose between variables and literals
+    is_literal = rng.choices([True, False], weights=context.literal_weights, k=len(others))
+    literals   = [i for i, chosen in zip(others, is_literal) if chosen is True]
+    references = [i for i, chosen in zip(others, is_literal) if chosen is False]
+
+    # fill them in, one batch per sort
+    for sort, indices in group_indices(sorts, literals).items():
+        for i, literal in zip(indices, make_random_literals(context, sort, len(indices))):
+            terminals[i] = literal
+
+    for sort, indices in group_indices(sorts, references).items():
+        for i, variable in zip(indices, rng.choices(variables[sort], k=len(indices))):
+            terminals[i] = variable
+
+    return terminals
+
+def expand_level(context, specs):
+    '''
+    Randomly pick a node for every (sort, depth) spec in one level of the
+    AST. Returns a slot for each spec, and the specs of the next level.
+    '''
+    rng       = context.rng
+    num_specs = len(specs)
+    sorts     = [sort for sort, depth in specs]
+    depths    = [depth for sort, depth in specs]
+
+    # if semantics are going to hell, then randomly reinvent the sorts
+    if context.semantically_valid is False:
+        sorts = rng.choices(EXPRESSION_SORTS, k=num_specs)
+
+    # at depth 0, make terminals
+    nonterminals = [i for i in range(num_specs) if depths[i] >= 1]
+
+    # get random expression generators, one batch per sort
+    productions = [None] * num_specs
+    for sort, indices in group_indices(sorts, nonterminals).items():
+        for i, production in zip(indices, rng.choices(context.productions[sort], k=len(indices))):
+            productions[i] = production
+
+    # randomly shrink the depths, one batch per depth
+    shrunken = [0] * num_specs
+    for depth, indices in group_indices(depths, nonterminals).items():
+        for i, new_depth in zip(indices, rng.choices(range(depth), k=len(indices))):
+            shrunken[i] = new_depth
+
+    # if an expression takes any sort, pick one
+    takes_any = [i for i in nonterminals if productions[i].takes_any]
+    collapsed = dict(zip(takes_any, rng.choices(EXPRESSION_SORTS, k=len(takes_any))))
+
+    # lay out the arguments in the next level
+    slots      = []
+    next_specs = []
+    for i in range(num_specs):
+        production = productions[i]
+
+        if production is None:
+            slots.append(Slot(None, sorts[i], 0, 0))
+            continue
+
+        if production.takes_any:
+            signature = [collapsed[i]] * production.num_args
+        else:
+            signature = production.signature
+
+        slots.append(Slot(production.node, sorts[i], len(next_specs), production.num_args))
+        next_specs.extend((arg_sort, shrunken[i]) for arg_sort in signature)
+
+    return slots, next_specs
+
+def build_expressions(context, variables, levels):
+    '''
+    Build the expressions laid out in levels of slots, bottom-up, because
+    every node needs its arguments.
+    '''
+    below = []
+    for slots in reversed(levels):
+        terminal_sorts = [slot.sort for slot in slots if slot.node is None]
+        terminals      = iter(make_random_terminals(context, variables, terminal_sorts))
+
+        built = []
+        for slot in slots:
+            if slot.node is None:
+                built.append(next(terminals))
+            else:
+                built.append(slot.node(*below[slot.first_arg:slot.first_arg + slot.num_args]))
+
+        below = built
+
+    return below
+
+def make_random_expressions(context, variables, specs):
+
+    # NOTE:
+    #      the AST is expanded one level at a time, top-down, so that all the
+    #      random choices for a level can be drawn in batches
+    levels = []
+    while len(specs) > 0:
+        slots, specs = expand_level(context, specs)
+        levels.append(slots)
+
+    return build_expressions(context, variables, levels)
+
+# sized generation
+# NOTE:
+#      expressions of a given size are made with a Boltzmann sampler: every
+#      node is a terminal or a production, chosen with probability
+#      proportional to the number of expressions that can be made from it,
+#      as given by the generating functions of the grammar evaluated at their
+#      singularity; the sampler is restarted when an expression comes out
+#      too small, and stopped as soon as it gets too big, which takes
+#      expected time linear in the size as long as some tolerance is allowed
+def get_arg_value(sort, values):
+    if sort == ANY_SORT:
+        return sum(values.values())
+    return values[sort]
+
+def get_arg_sorts(production, semantically_valid):
+    if semantically_valid is False:
+        return [ANY_SORT] * production.num_args
+    return production.signature
+
+def evaluate_grammar(productions, semantically_valid, parameter, values):
+    '''
+    Evaluate the generating function of every sort, and its Jacobian, at the
+    given parameter and sort values.
+    '''
+    results  = {}
+    jacobian = {}
+    for sort in EXPRESSION_SORTS:
+        result      = 1.0
+        derivatives = {other: 0.0 for other in EXPRESSION_SORTS}
+
+        for production in productions[sort]:
+            arg_sorts  = get_arg_sorts(production, semantically_valid)
+            arg_values = [get_arg_value(arg_sort, values) for arg_sort in arg_sorts]
+            result    += math.prod(arg_values)
+
+            # product rule
+            for i, arg_sort in enumerate(arg_sorts):
+                others = math.prod(arg_values[:i] + arg_values[i + 1:])
+                for other in EXPRESSION_SORTS:
+                    if arg_sort == ANY_SORT or arg_sort == other:
+                        derivatives[other] += others
+
+        results[sort]  = parameter * result
+        jacobian[sort] = {other: parameter * d for other, d in derivatives.items()}
+
+    return results, jacobian
+
+def solve_linear(matrix, vector):
+    '''
+    Solve a small linear system by Gaussian elimination. Returns None if it's
+    singular.
+    '''
+    n    = len(vector)
+    rows = [list(row) + [v] for row, v in zip(matrix, vector)]
+
+    for column in range(n):
+        pivot = max(range(column, n), key=lambda r: abs(rows[r][column]))
+        if abs(rows[pivot][column]) < NEWTON_TOLERANCE:
+            return None
+        rows[column], rows[pivot] = rows[pivot], rows[column]
+
+        for r in range(n):
+            if r != column:
+                factor = rows[r][column] / rows[column][column]
+                rows[r] = [a - factor * b for a, b in zip(rows[r], rows[column])]
+
+    return [rows[r][n] / rows[r][r] for r in range(n)]
+
+def find_values(productions, semantically_valid, parameter):
+    '''
+    Find the values of the generating functions at the given parameter with
+    Newton's method, starting from zero. Returns None if they're infinite,
+    which is the case past the singularity.
+    '''
+    values = {sort: 0.0 for sort in EXPRESSION_SORTS}
+    for step in range(NEWTON_STEPS):
+        results, jacobian = evaluate_grammar(productions, semantically_valid, parameter, values)
+
+        # solve (I - J) delta = F(y) - y
+        matrix = [[float(s == t) - jacobian[s][t] for t in EXPRESSION_SORTS] for s in EXPRESSION_SORTS]
+        delta  = solve_linear(matrix, [results[s] - values[s] for s in EXPRESSION_SORTS])
+
+        # from zero, the iterates only ever go up below the singularity
+        if delta is None or min(delta) < -NEWTON_TOLERANCE:
+            return None
+
+        values = {s: values[s] + d for s, d in zip(EXPRESSION_SORTS, delta)}
+        if not all(math.isfinite(v) for v in values.values()):
+            return None
+
+        if max(delta) <= NEWTON_TOLERANCE * max(values.values()):
+            return values
+
+    return None
+
+@functools.lru_cache(maxsize=None)
+def get_boltzmann(semantically_valid):
+    productions = make_productions(NONTERMINALS)
+
+    # find the singularity by bisection
+    # NOTE:
+    #      every node counts at least as much as a terminal, so the
+    #      singularity of a recursive grammar is below 1
+    low    = 0.0
+    high   = 1.0
+    values = find_values(productions, semantically_valid, low)
+    for step in range(BISECTION_STEPS):
+        middle     = (low + high) / 2
+        new_values = find_values(productions, semantically_valid, middle)
+        if new_values is None:
+            high = middle
+        else:
+            low    = middle
+            values = new_values
+
+    # make the tables
+    choices     = {}
+    cum_weights = {}
+    for sort in EXPRESSION_SORTS:
+        weights = [1.0]
+        for production in productions[sort]:
+            arg_sorts = get_arg_sorts(production, semantically_valid)
+            weights.append(math.prod(get_arg_value(arg_sort, values) for arg_sort in arg_sorts))
+
+        choices[sort]     = [None] + productions[sort]
+        cum_weights[sort] = list(itertools.accumulate(weights))
+
+    sort_weights = list(itertools.accumulate(values[sort] for sort in EXPRESSION_SORTS))
+
+    return Boltzmann(low, values, choices, cum_weights, sort_weights)
+
+def expand_sized_level(context, boltzmann, sorts):
+    rng      = context.rng
+    num_ends = len(sorts)
+
+    # pick the sorts of nodes that can be any sort
+    anything = [i for i in range(num_ends) if sorts[i] == ANY_SORT]
+    if len(anything) > 0:
+        sorts = list(sorts)
+        for i, sort in zip(anything, rng.choices(EXPRESSION_SORTS, cum_weights=boltzmann.sort_weights, k=len(anything))):
+            sorts[i] = sort
+
+    # pick terminals or productions, one batch per sort
+    productions = [None] * num_ends
+    for sort, indices in group_indices(sorts, range(num_ends)).items():
+        chosen = rng.choices(boltzmann.choices[sort], cum_weights=boltzmann.cum_weights[sort], k=len(indices))
+        for i, production in zip(indices, chosen):
+            productions[i] = production
+
+    # lay out the arguments in the next level
+    slots      = []
+    next_sorts = []
+    for sort, production in zip(sorts, productions):
+        if production is None:
+            slots.append(Slot(None, sort, 0, 0))
+            continue
+
+        slots.append(Slot(production.node, sort, len(next_sorts), production.num_args))
+        next_sorts.extend(get_arg_sorts(production, context.semantically_valid))
+
+    return slots, next_sorts
+
+def sample_sized_levels(context, boltzmann, sort, min_size, max_size):
+    '''
+    Try to lay out an expression with between min_size and max_size nodes.
+    Returns None if it came out too small or too big.
+    '''
+    levels = []
+    sorts  = [sort]
+    size   = 0
+    while len(sorts) > 0:
+        size += len(sorts)
+        if size > max_size:
+            return None
+
+        slots, sorts = expand_sized_level(context, boltzmann, sorts)
+        levels.append(slots)
+
+    if size < min_size:
+        return None
+
+    return levels
+
+# NOTE:
+#      when the sizes allowed are too few for rejection to work, expressions
+#      are made by the recursive method instead: the number of expressions of
+#      each sort and size is counted, and every choice, from the node at the
+#      top to how many nodes each argument gets, is made with probability
+#      proportional to the number of expressions it leaves possible; this
+#      hits the size exactly, at the cost of counting up to it once, in time
+#      quadratic in the size
+class SizeCounts(object):
+    '''
+    The number of expressions of each sort, and of each sequence of sorts
+    that's a suffix of some production's arguments, with each number of nodes
+    up to some size. Counts are scaled by the Boltzmann parameter to the power
+    of their size, so that they stay within floating-point range.
+    '''
+
+    def __init__(self, parameter, productions, semantically_valid):
+        self.parameter = parameter
+        self.options   = {}
+        sequences      = set()
+        for sort in EXPRESSION_SORTS:
+            self.options[sort] = [(p, tuple(get_arg_sorts(p, semantically_valid))) for p in productions[sort]]
+            for production, arg_sorts in self.options[sort]:
+                sequences.update(arg_sorts[i:] for i in range(len(arg_sorts)))
+
+        # longer sequences are counted from shorter ones
+        self.sequences = sorted((s for s in sequences if len(s) > 1), key=len)
+
+        # no expressions have no nodes, but there's one empty sequence
+        self.sorts  = {sort: [0.0] for sort in EXPRESSION_SORTS + [ANY_SORT]}
+        self.tables = {sequence: [0.0] for sequence in self.sequences}
+        self.tables[()] = [1.0]
+        for sort, table in self.sorts.items():
+            self.tables[(sort,)] = table
+
+        # NOTE:
+        #      counts are shared by every generator in the process, so they're
+        #      grown by one thread at a time, and size only goes up once a
+        #      whole row is counted, so readers never see a partial row
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def grow(self, max_size):
+        '''
+        Count expressions up to max_size nodes.
+        '''
+        if max_size <= self.size:
+            return
+
+        with self.lock:
+            for n in range(self.size + 1, max_size + 1):
+                self.tables[()].append(0.0)
+
+                # an expression is a terminal, or a node over arguments with
+                # one node fewer in total
+                for sort in EXPRESSION_SORTS:
+                    total = 1.0 if n == 1 else 0.0
+                    for production, arg_sorts in self.options[sort]:
+                        total += self.tables[arg_sorts][n - 1]
+                    self.sorts[sort].append(self.parameter * total)
+
+                self.sorts[ANY_SORT].append(sum(self.sorts[sort][n] for sort in EXPRESSION_SORTS))
+
+                # a sequence is its first expression and the rest
+                for sequence in self.sequences:
+                    first = self.sorts[sequence[0]]
+                    rest  = self.tables[sequence[1:]]
+                    self.tables[sequence].append(sum(map(operator.mul, first[1:n + 1], rest[n - 1::-1])))
+
+                self.size = n
+
+    def get_weight(self, sequence, size, first_size):
+        return self.sorts[sequence[0]][first_size] * self.tables[sequence[1:]][size - first_size]
+
+    def split(self, rng, sequence, size):
+        '''
+        Randomly pick how many of a sequence's size nodes its first
+        expression gets.
+        '''
+        if len(sequence) == 1:
+            return size
+
+        # NOTE:
+        #      first sizes are tried from both ends in turn, which takes time
+        #      proportional to the smaller of the two parts
+        low    = 1
+        high   = size - len(sequence) + 1
+        target = rng.random() * self.tables[sequence][size]
+        while low <= high:
+            target -= self.get_weight(sequence, size, low)
+            if target < 0:
+                return low
+
+            if high != low:
+                target -= self.get_weight(sequence, size, high)
+                if target < 0:
+                    return high
+
+            low  += 1
+            high -= 1
+
+        # only rounding errors get here
+        return max(range(1, size - len(sequence) + 2), key=lambda first_size: self.get_weight(sequence, size, first_size))
+
+@functools.lru_cache(maxsize=None)
+def get_size_counts(semantically_valid):
+    boltzmann = get_boltzmann(semantically_valid)
+    return SizeCounts(boltzmann.parameter, make_productions(NONTERMINALS), semantically_valid)
+
+def pick_exact_size(context, counts, sort, min_size, max_size):
+    '''
+    Pick a size between min_size and max_size, in proportion to the number of
+    expressions of that size.
+    '''
+    sizes = [n for n in range(min_size, max_size + 1) if counts.sorts[sort][n] > 0]
+    if len(sizes) == 0:
+        raise ValueError('there are no expressions with {} to {} nodes'.format(min_size, max_size))
+
+    logs    = [math.log(counts.sorts[sort][n]) - n * math.log(counts.parameter) for n in sizes]
+    biggest = max(logs)
+    return context.rng.choices(sizes, weights=[math.exp(l - biggest) for l in logs])[0]
+
+def sample_exact_levels(context, counts, sort, size):
+    '''
+    Lay out an expression with exactly size nodes.
+    '''
+    rng    = context.rng
+    levels = []
+    ends   = [(sort, size)]
+    while len(ends) > 0:
+        slots     = []
+        next_ends = []
+        for sort, size in ends:
+
+            # pick the sorts of nodes that can be any sort
+            if sort == ANY_SORT:
+                sort = rng.choices(EXPRESSION_SORTS, weights=[counts.sorts[s][size] for s in EXPRESSION_SORTS])[0]
+
+            # only terminals have one node
+            if size == 1:
+                slots.append(Slot(None, sort, 0, 0))
+                continue
+
+            # pick a production, and share out the rest of the nodes among its arguments
+            options = counts.options[sort]
+            weights = [counts.tables[arg_sorts][size - 1] for production, arg_sorts in options]
+            production, arg_sorts = rng.choices(options, weights=weights)[0]
+
+            slots.append(Slot(production.node, sort, len(next_ends), production.num_args))
+            remaining = size - 1
+            for i, arg_sort in enumerate(arg_sorts):
+                arg_size   = counts.split(rng, arg_sorts[i:], remaining)
+                remaining -= arg_size
+                next_ends.append((arg_sort, arg_size))
+
+        levels.append(slots)
+        ends = next_ends
+
+    return levels
+
+def make_sized_expression(context, variables, size, tolerance):
+    boltzmann = get_boltzmann(context.semantically_valid)
+    min_size  = max(1, math.ceil(size * (1.0 - tolerance)))
+    max_size  = math.floor(size * (1.0 + tolerance))
+
+    # roots are booleans unless semantics don't matter
+    if context.semantically_valid is True:
+        root_sort = BOOL_SORT
+    else:
+        root_sort = ANY_SORT
+
+    # try rejection first if enough sizes are allowed, since it takes linear time
+    if tolerance >= MIN_REJECTED_TOLERANCE:
+        for attempt in range(MAX_SIZED_ATTEMPTS):
+            levels = sample_sized_levels(context, boltzmann, root_sort, min_size, max_size)
+            if levels is not None:
+                return build_expressions(context, variables, levels)[0]
+
+    # otherwise, count expressions to make one of exactly some size
+    counts = get_size_counts(context.semantically_valid)
+    counts.grow(max_size)
+    levels = sample_exact_levels(context, counts, root_sort, pick_exact_size(context, counts, root_sort, min_size, max_size))
+    return build_expressions(context, variables, levels)[0]
+
+def make_random_ast(num_vars, num_asserts, depth, max_terms, max_str_lit_length, max_int_lit, literal_probability, semantically_valid, size=None, size_tolerance=DEFAULT_SIZE_TOLERANCE, rng=random):
+
+    # create context
+    context = RandomASTContext(
+        max_terms           = max_terms,
+        max_str_lit_length  = max_str_lit_length,
+        max_int_lit         = max_int_lit,
+        literal_probability = literal_probability,
+        semantically_valid  = semantically_valid,
+        rng                 = rng,
+    )
 
     # create variables
-    variables = {s: [smt_new_var() for i in range(num_vars)] for s in DECLARABLE_SORTS}
+    variables = {s: [smt_new_var(context.counters) for i in range(num_vars)] for s in DECLARABLE_SORTS}
 
     # create declarations
     declarations = []
@@ -157,8 +632,13 @@ def make_random_ast(num_vars, num_asserts, depth, max_terms, max_str_lit_length,
         new_declarations = [smt_declare_var(v, sort=s) for v in variables[s]]
         declarations.extend(new_declarations)
 
-    # create asserts
-    asserts = [generate_assert(variables, depth) for i in range(num_asserts)]
+    # create asserts, either of a given size, or all at once up to a depth
+    if size is not None:
+        expressions = [make_sized_expression(context, variables, size, size_tolerance) for i in range(num_asserts)]
+    else:
+        expressions = make_random_expressions(context, variables, [(BOOL_SORT, depth)] * num_asserts)
+
+    asserts = [AssertNode(e) for e in expressions]
 
     # add check-sat
     expressions = asserts + [CheckSatNode()]
@@ -167,5 +647,4 @@ def make_random_ast(num_vars, num_asserts, depth, max_terms, max_str_lit_length,
 
 # public API
 def random_ast(*args, **kwargs):
-    smt_reset_counters()
     return make_random_ast(*args, **kwargs)
@@ -1,6 +1,7 @@
 import random
 
 from stringfuzz.scanner import ALPHABET, WHITESPACE
+from stringfuzz.util import random_string
 
 __all__ = [
     'random_text',
@@ -10,8 +11,8 @@ __all__ = [
 ALL_CHARS = ALPHABET + WHITESPACE
 
 # functions
-def make_random_text(length):
-    return ''.join(random.choice(ALL_CHARS) for i in range(length))
+def make_random_text(length, rng=random):
+    return random_string(length, rng, ALL_CHARS)
 
 # public API
 def random_text(*args, **kwargs):
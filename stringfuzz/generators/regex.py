@@ -65,52 +65,65 @@ OPERATOR_TYPES = [
     OPERATOR_RANDOM,
 ]
 
-# global config
-# NOTE:
-#      using globals because it's annoying to pass around a bunch of variables
-_cursor       = 0
-_literal_type = None
-_literal_min  = 1
-_literal_max  = 1
+# data structures
+class RegexContext(object):
+    '''
+    Configuration and state for generating one regex problem.
+    '''
+
+    def __init__(self, literal_type, membership_type, literal_min, literal_max, operators, operator_type, rng):
+        self.cursor                = 0
+        self.literal_type          = literal_type
+        self.configured_membership = membership_type
+        self.current_membership    = membership_type
+        self.literal_min           = literal_min
+        self.literal_max           = literal_max
+        self.operator_list         = []
+        self.operator_type         = operator_type
+        self.counters              = Counters()
+        self.rng                   = rng
+
+        # parse operator list in order, in case user wants a custom alternation order
+        for c in operators:
+            if c not in self.operator_list:
+                self.operator_list.append(c)
 
 # helpers
 def fill_string(character, length):
     return character * length
 
-def get_char_and_advance():
-    global _cursor
-    character = ALPHABET[_cursor]
-    _cursor   = (_cursor + 1) % len(ALPHABET)
+def get_char_and_advance(context):
+    character      = ALPHABET[context.cursor]
+    context.cursor = (context.cursor + 1) % len(ALPHABET)
     return character
 
-def make_regex_string(min_length, max_length):
-    global _literal_type
+def make_regex_string(context, min_length, max_length):
 
-    chosen_length = random.randint(min_length, max_length)
+    chosen_length = context.rng.randint(min_length, max_length)
 
     # use a fixed-length string of one character, each time using
     # the next character from the alphabet
-    if _literal_type == INCREASING_LITERALS:
-        filler = get_char_and_advance()
+    if context.literal_type == INCREASING_LITERALS:
+        filler = get_char_and_advance(context)
         string = fill_string(filler, chosen_length)
 
     # generate a random string
-    elif _literal_type == RANDOM_LITERALS:
-        string = random_string(chosen_length)
+    elif context.literal_type == RANDOM_LITERALS:
+        string = random_string(chosen_length, context.rng)
 
     return smt_str_to_re(smt_str_lit(string))
 
-def make_random_term(depth, operator_index):
+def make_random_term(context, depth, operator_index):
     if depth == 0:
-        return make_regex_string(_literal_min, _literal_max)
+        return make_regex_string(context, context.literal_min, context.literal_max)
 
-    if _operator_type == OPERATOR_ALTERNATING:
+    if context.operator_type == OPERATOR_ALTERNATING:
         next_operator_index = operator_index + 1
     else:
-        next_operator_index = random.randrange(len(_operator_list))
+        next_operator_index = context.rng.randrange(len(context.operator_list))
 
-    operator = get_operator_at_index(operator_index)
-    subterm = make_random_term(depth - 1, next_operator_index)
+    operator = get_operator_at_index(context, operator_index)
+    subterm = make_random_term(context, depth - 1, next_operator_index)
 
     if operator == OPERATOR_STAR:
         return smt_regex_star(subterm)
@@ -119,22 +132,22 @@ def make_random_term(depth, operator_index):
         return smt_regex_plus(subterm)
 
     if operator == OPERATOR_UNION:
-        second_subterm = make_random_term(depth - 1, next_operator_index)
+        second_subterm = make_random_term(context, depth - 1, next_operator_index)
         return smt_regex_union(subterm, second_subterm)
 
     if operator == OPERATOR_INTER:
-        second_subterm = make_random_term(depth - 1, next_operator_index)
+        second_subterm = make_random_term(context, depth - 1, next_operator_index)
         return smt_regex_inter(subterm, second_subterm)
 
     if operator == OPERATOR_CONCAT:
-        second_subterm = make_random_term(depth - 1, next_operator_index)
+        second_subterm = make_random_term(context, depth - 1, next_operator_index)
         return smt_regex_concat(subterm, second_subterm)
 
-def make_random_terms(num_terms, depth):
-    if _operator_type == OPERATOR_ALTERNATING:
-        terms = [make_random_term(depth, 0) for i in range(num_terms)]
+def make_random_terms(context, num_terms, depth):
+    if context.operator_type == OPERATOR_ALTERNATING:
+        terms = [make_random_term(context, depth, 0) for i in range(num_terms)]
     else:
-        terms = [make_random_term(depth, random.randrange(len(_operator_list))) for i in range(num_terms)]
+        terms = [make_random_term(context, depth, context.rng.randrange(len(context.operator_list))) for i in range(num_terms)]
 
     regex = join_terms_with(terms, smt_regex_concat)
     return regex
@@ -144,31 +157,27 @@ def toggle_membership_type(t):
         return MEMBER_NOT_IN
     return MEMBER_IN
 
-def get_operator_at_index(index):
-    global _operator_list
+def get_operator_at_index(context, index):
+    return context.operator_list[index % len(context.operator_list)]
 
-    return _operator_list[index % len(_operator_list)]
-
-def make_constraint(variable, r):
-    global _configured_membership
-    global _current_membership
+def make_constraint(context, variable, r):
 
     # if random, set the membership type randomly
-    if _configured_membership == MEMBER_RANDOM:
-        if coin_toss():
-            _current_membership = MEMBER_IN
+    if context.configured_membership == MEMBER_RANDOM:
+        if coin_toss(context.rng):
+            context.current_membership = MEMBER_IN
         else:
-            _current_membership = MEMBER_NOT_IN
+            context.current_membership = MEMBER_NOT_IN
 
     # if toggle, toggle membership type
-    elif _configured_membership == MEMBER_ALTERNATING:
-        _current_membership = toggle_membership_type(_current_membership)
+    elif context.configured_membership == MEMBER_ALTERNATING:
+        context.current_membership = toggle_membership_type(context.current_membership)
 
     # create constraint
     constraint = smt_regex_in(variable, r)
 
     # negate it if required
-    if _current_membership == MEMBER_NOT_IN:
+    if context.current_membership == MEMBER_NOT_IN:
         constraint = smt_not(constraint)
 
     return constraint
@@ -186,6 +195,7 @@ def make_regex(
     min_var_length,
     operators,
     operator_type,
+    rng=random,
 ):
 
     # check args
@@ -225,32 +235,19 @@ def make_regex(
     if operator_type not in OPERATOR_TYPES:
         raise ValueError('unknown operator type: {!r}'.format(operator_type))
 
-    # set globals
-    global _cursor
-    global _literal_type
-    global _configured_membership
-    global _current_membership
-    global _literal_min
-    global _literal_max
-    global _operator_list
-    global _operator_type
-
-    _cursor                = 0
-    _literal_type          = literal_type
-    _configured_membership = membership_type
-    _current_membership    = _configured_membership
-    _literal_min           = literal_min
-    _literal_max           = literal_max
-    _operator_list         = []
-    _operator_type         = operator_type
-
-    # parse operator list in order, in case user wants a custom alternation order
-    for c in operators:
-        if c not in _operator_list:
-            _operator_list.append(c)
+    # create context
+    context = RegexContext(
+        literal_type    = literal_type,
+        membership_type = membership_type,
+        literal_min     = literal_min,
+        literal_max     = literal_max,
+        operators       = operators,
+        operator_type   = operator_type,
+        rng             = rng,
+    )
 
     # create variable
-    matched = smt_new_var()
+    matched = smt_new_var(context.counters)
 
     # create regexes
     regexes = []
@@ -258,15 +255,15 @@ def make_regex(
 
         # reset alphabet for every regex if required
         if reset_alphabet is True:
-            _cursor = 0
+            context.cursor = 0
 
-        new_regex = make_random_terms(num_terms, term_depth)
+        new_regex = make_random_terms(context, num_terms, term_depth)
         regexes.append(new_regex)
 
     # create regex constraints
     expressions = []
     for r in regexes:
-        constraint = make_constraint(matched, r)
+        constraint = make_constraint(context, matched, r)
         expressions.append(smt_assert(constraint))
 
     # create length constraints if required
@@ -292,5 +289,4 @@ def make_regex(
 
 # public API
 def regex(*args, **kwargs):
-    smt_reset_counters()
     return make_regex(*args, **kwargs)
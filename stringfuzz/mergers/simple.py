@@ -1,33 +1,133 @@
-import itertools
+import sys
 
-from stringfuzz.ast import ExpressionNode, SortNode, IdentifierNode, FunctionDeclarationNode, SortedVarNode
-from stringfuzz.ast_walker import ASTWalker
+from collections import deque
+
+from stringfuzz.ast import ExpressionNode, GenericExpressionNode, IdentifierNode, FunctionDeclarationNode, FunctionDefinitionNode, ConstantDeclarationNode
+from stringfuzz.sharing import structural_digest
 
 __all__ = [
-    'simple'
+    'simple',
+    'simple_stream',
 ]
 
-def alternate_merge(asts, merged):
-    for ast in asts:
-        if ast:
-            node = ast.pop(0)
-            if not node in merged:
-                merged.append(node)
-    if any(asts):
-        merged = alternate_merge(asts, merged)
-    return merged
+# constants
+DECLARE_CONST = 'declare-const'
+DECLARATIONS  = (
+    FunctionDeclarationNode,
+    FunctionDefinitionNode,
+    ConstantDeclarationNode,
+)
 
-class RenameIDWalker(ASTWalker):
-    def __init__(self, ast, suffix):
-        super(RenameIDWalker, self).__init__(ast)
-        self.suffix = suffix
+# data structures
+class SymbolTable(object):
+    '''
+    The names declared in one input, and the names they're renamed to.
+    '''
 
-    def exit_identifier(self, identifier, parent):
-        identifier.name += "_{}".format(self.suffix)
+    def __init__(self, suffix):
+        self.suffix  = suffix
+        self.renames = {}
 
-def simple(asts, rename_ids):
+    def declare(self, name):
+        if name not in self.renames:
+            self.renames[name] = sys.intern('{}_{}'.format(name, self.suffix))
+
+# helpers
+def get_declared_name(node):
+
+    # NOTE:
+    #      declare-const is parsed as a generic expression
+    if isinstance(node, GenericExpressionNode):
+        if isinstance(node.symbol, IdentifierNode) and node.symbol.name == DECLARE_CONST:
+            return node.body[0].name
+
+    if isinstance(node, DECLARATIONS):
+        return node.body[0].name
+
+    return None
+
+def get_parameter_names(node):
+    if isinstance(node, FunctionDefinitionNode):
+        return set(parameter.var_name.name for parameter in node.body[1].body)
+    return set()
+
+def rename_command(command, table):
+    '''
+    Rename the names that are bound in table in a command, after adding the
+    name it declares, if any. Only declared names are renamed: built-ins
+    parsed as identifiers, sorts, and a function's parameters in its body
+    are left alone.
+    '''
+    name = get_declared_name(command)
+    if name is not None:
+        table.declare(name)
+
+    renames    = table.renames
+    parameters = get_parameter_names(command)
+    stack      = [command]
+    while len(stack) > 0:
+        node = stack.pop()
+
+        if isinstance(node, IdentifierNode):
+            if node.name in renames and node.name not in parameters:
+                node.name = renames[node.name]
+
+        elif isinstance(node, ExpressionNode):
+
+            # calls to declared functions have them as their symbols
+            if isinstance(node, GenericExpressionNode):
+                stack.append(node.symbol)
+
+            stack.extend(node.body)
+
+def take_turns(streams):
+    '''
+    Yield one command from each stream in turn, until they all run out.
+    '''
+
+    # NOTE:
+    #      the streams take turns in a queue, so each turn takes constant
+    #      time however many streams there are
+    queues = deque(iter(stream) for stream in streams)
+    while len(queues) > 0:
+        stream = queues.popleft()
+        for node in stream:
+            yield node
+
+            # put the stream back at the end of the line
+            queues.append(stream)
+            break
+
+def unique(nodes):
+    '''
+    Yield nodes, leaving out ones structurally equal to ones already yielded.
+    '''
+
+    # NOTE:
+    #      only a small digest of each distinct node is kept, so the nodes
+    #      themselves can be let go of as soon as they're used
+    taken = set()
+    for node in nodes:
+        digest = structural_digest(node)
+        if digest not in taken:
+            taken.add(digest)
+            yield node
+
+def rename(stream, suffix):
+    table = SymbolTable(suffix)
+    for node in stream:
+        rename_command(node, table)
+        yield node
+
+def simple_stream(streams, rename_ids):
+    '''
+    Like simple, but merges streams of commands as they come, yielding each
+    merged command as soon as it's taken.
+    '''
     if rename_ids:
-        for i in range(len(asts)):
-            asts[i] = RenameIDWalker(asts[i], i).walk()
-    merged = alternate_merge(asts, [])
+        streams = [rename(stream, i) for i, stream in enumerate(streams)]
+    return unique(take_turns(streams))
+
+def simple(asts, rename_ids):
+    merged = list(simple_stream(asts, rename_ids))
     return merged
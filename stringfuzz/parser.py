@@ -1,12 +1,16 @@
 import re
 
-from stringfuzz.scanner import scan
+from stringfuzz.constants import SMT_25_STRING
+from stringfuzz.scanner import scan, ID_CHAR
+from stringfuzz.compression import read_text
 from stringfuzz.ast import *
 from stringfuzz.util import join_terms_with
 
 __all__ = [
     'parse',
     'parse_file',
+    'parse_commands',
+    'split_commands',
     'parse_tokens',
     'ParsingError',
 ]
@@ -14,6 +18,24 @@ __all__ = [
 # constants
 MAX_ERROR_SIZE = 200
 UNDERLINE      = '-'
+READ_SIZE      = 2 ** 16
+
+# command splitting
+# NOTE:
+#      splitting only needs to know where parentheses, string literals and
+#      comments are; "//" only starts a comment where a token can start,
+#      because the scanner reads it as part of an identifier otherwise
+NORMAL  = 'normal'
+STRING  = 'string'
+COMMENT = 'comment'
+
+NORMAL_PATTERN    = re.compile(r'[()";]|//')
+STRING_PATTERNS   = {
+    SMT_25_STRING: re.compile(r'"'),
+}
+ESCAPED_STRING    = re.compile(r'\\.|"', re.DOTALL)
+COMMENT_PATTERN   = re.compile(r'\n')
+IDENTIFIER_CHARS  = re.compile(ID_CHAR)
 
 MESSAGE_FORMAT = '''Parsing error on line {number}:
 
@@ -411,9 +433,93 @@ def get_expressions(s):
     return expressions
 
 # public API
+def split_commands(stream, language):
+    '''
+    Read a text stream bit by bit, and yield the text of each top-level
+    command in it as soon as it has been read. Anything after the last
+    command, other than whitespace and comments, is yielded too, so that
+    parsing it fails as usual.
+    '''
+    string_pattern = STRING_PATTERNS.get(language, ESCAPED_STRING)
+    patterns       = {
+        NORMAL:  NORMAL_PATTERN,
+        STRING:  string_pattern,
+        COMMENT: COMMENT_PATTERN,
+    }
+
+    buffer   = ''
+    start    = 0
+    position = 0
+    state    = NORMAL
+    depth    = 0
+    reading  = True
+    while True:
+        match = patterns[state].search(buffer, position)
+
+        # read more if there's nothing to act on yet, dropping the commands
+        # that have already been yielded
+        # NOTE:
+        #      the last character might start a match that isn't complete
+        #      yet (like a '/' or a '\\'), so it's searched again
+        if match is None:
+            if reading is False:
+                break
+            chunk = stream.read(READ_SIZE)
+            if len(chunk) == 0:
+                reading = False
+            position = max(position, len(buffer) - 1) - start
+            buffer   = buffer[start:] + chunk
+            start    = 0
+            continue
+
+        found    = match.group()
+        position = match.end()
+
+        if state == COMMENT:
+            state = NORMAL
+
+        elif state == STRING:
+            if found == '"':
+                state = NORMAL
+
+        elif found == '"':
+            state = STRING
+
+        elif found == ';':
+            state = COMMENT
+
+        elif found == '//':
+            if match.start() == 0 or IDENTIFIER_CHARS.match(buffer, match.start() - 1) is None:
+                state = COMMENT
+
+        elif found == '(':
+            depth += 1
+
+        # yield commands as soon as they close
+        elif found == ')':
+            depth -= 1
+            if depth <= 0:
+                yield buffer[start:position]
+                start = position
+                depth = 0
+
+    # yield anything left over that isn't just whitespace and comments
+    rest = buffer[start:]
+    if len(scan(rest, language)) > 0:
+        yield rest
+
+def parse_commands(stream, language):
+    '''
+    Parse the top-level commands in a text stream one at a time, yielding
+    each one as it's parsed, so that the whole text is never in memory at
+    once. Line numbers in parsing errors count from the start of the
+    command that failed.
+    '''
+    for text in split_commands(stream, language):
+        yield from parse(text, language)
+
 def parse_file(path, language):
-    with open(path, 'r') as file:
-        return parse(file.read(), language)
+    return parse(read_text(path), language)
 
 def parse(text, language):
     return parse_tokens(scan(text, language), language, text)
@@ -0,0 +1,125 @@
+'''
+Running several transformers, one after another, over one AST.
+
+Every stage works on the AST in memory, so a pipeline's input is parsed once
+and its output generated once. Runs of consecutive stages that only rewrite
+literals, one literal at a time, are fused into a single walk over the AST.
+Their RNG draws happen in the same order either way, so fusing doesn't change
+the output.
+'''
+
+from collections import namedtuple
+
+from stringfuzz.ast import SettingNode, ExpressionNode, MetaCommandNode
+from stringfuzz.ast_walker import ASTWalker
+from stringfuzz.transformers import translate, multiply, nop
+from stringfuzz.transformers.translate import make_translator
+from stringfuzz.transformers.multiply import make_multiplier
+
+__all__ = [
+    'Stage',
+    'run_pipeline',
+    'reseed_stages',
+    'filter_commands',
+]
+
+# constants
+GET_MODEL = "get-model"
+GET_INFO  = "get-info"
+TO_STRIP  = [GET_MODEL, GET_INFO]
+
+# NOTE:
+#      these transformers only implement exit_literal, and only change the
+#      literal they're given, so applying them one after another to each
+#      literal is the same as applying them one after another to the AST
+LITERAL_WALKERS = {
+    translate: make_translator,
+    multiply:  make_multiplier,
+}
+
+# data structures
+Stage = namedtuple('Stage', ('transformer', 'arguments'))
+
+class FusedWalker(ASTWalker):
+    '''
+    Runs the exit_literal hooks of several literal-only walkers, in order,
+    in one walk.
+    '''
+
+    def __init__(self, ast, walkers):
+        super().__init__(ast)
+        self.walkers = walkers
+
+    def exit_literal(self, literal, parent):
+        for walker in self.walkers:
+            walker.exit_literal(literal, parent)
+
+# helpers
+def should_keep(expr):
+    if isinstance(expr, SettingNode):
+        return False
+    if isinstance(expr, MetaCommandNode):
+        return False
+    if isinstance(expr, ExpressionNode):
+        if expr.symbol in TO_STRIP:
+            return False
+    return True
+
+def is_fusable(stage):
+    return stage.transformer in LITERAL_WALKERS
+
+def group_stages(stages):
+    groups = []
+    for stage in stages:
+        if len(groups) > 0 and is_fusable(stage) and is_fusable(groups[-1][-1]):
+            groups[-1].append(stage)
+        else:
+            groups.append([stage])
+    return groups
+
+def run_group(ast, group):
+
+    # run unfused stages as they are
+    if len(group) == 1:
+        stage = group[0]
+        return stage.transformer(ast, **stage.arguments)
+
+    # make the walkers in order, so that they draw from RNGs in order
+    walkers = [LITERAL_WALKERS[stage.transformer](ast, **stage.arguments) for stage in group]
+    return FusedWalker(ast, walkers).walk()
+
+# public API
+def filter_commands(ast, stages):
+    '''
+    Drop settings, meta commands and model and info requests from ast, as
+    transformers expect, unless every stage is nop, which should not modify
+    anything.
+    '''
+    if all(stage.transformer is nop for stage in stages):
+        return ast
+    return list(filter(should_keep, ast))
+
+def reseed_stages(stages, rng):
+    '''
+    Get stages like the given ones, but with rng instead of the RNGs of the
+    stages that take one.
+    '''
+    return [
+        Stage(stage.transformer, dict(stage.arguments, rng=rng)) if 'rng' in stage.arguments else stage
+        for stage in stages
+    ]
+
+def run_pipeline(ast, stages, fuse=True):
+    '''
+    Run stages, each a transformer and its keyword arguments, over ast in
+    order. Returns the transformed AST.
+    '''
+    if fuse is True:
+        groups = group_stages(stages)
+    else:
+        groups = [[stage] for stage in stages]
+
+    for group in groups:
+        ast = run_group(ast, group)
+
+    return ast
@@ -2,6 +2,7 @@ import re
 import string
 
 from stringfuzz.constants import *
+from stringfuzz.compression import read_text
 
 __all__ = [
     'scan',
@@ -263,5 +264,4 @@ def scan(string, language):
     return [t for t in tokens if t.name != 'WHITESPACE']
 
 def scan_file(path, language):
-    with open(path, 'r') as file:
-        return scan(file.read(), language)
+    return scan(read_text(path), language)
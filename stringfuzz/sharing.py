@@ -0,0 +1,242 @@
+'''
+Sharing of repeated subterms.
+
+Subterms are identified structurally by hash-consing: every distinct subterm
+gets a small integer id, computed bottom-up, so two subterms are equal exactly
+when their ids are. Subterms of asserts that occur more than once are then
+lifted into nullary auxiliary functions (define-fun) that are emitted once,
+right before the first command that uses them.
+
+Only string, integer and boolean subterms are shared, because there's no
+regex sort name that all solvers agree on.
+'''
+
+import copy
+import hashlib
+
+from stringfuzz.ast import *
+
+__all__ = [
+    'share',
+    'StructuralIndex',
+    'structural_digest',
+    'SHARED_PREFIX',
+]
+
+# constants
+SHARED_PREFIX = 'shared'
+DIGEST_SIZE   = 16
+SHARED_SORTS  = [
+    STRING_SORT,
+    INT_SORT,
+    BOOL_SORT,
+]
+
+# helpers
+def get_children(node):
+    if isinstance(node, ExpressionNode):
+        return list(node.body)
+    return []
+
+def get_symbol_name(node):
+    symbol = node.symbol
+    if isinstance(symbol, IdentifierNode):
+        return symbol.name
+    return symbol
+
+def is_shareable(node):
+    if not isinstance(node, ExpressionNode):
+        return False
+    if not hasattr(node, 'get_sort'):
+        return False
+    return node.get_sort() in SHARED_SORTS
+
+def rebuild(node, children):
+    if not isinstance(node, ExpressionNode):
+        return node
+    rebuilt      = copy.copy(node)
+    rebuilt.body = children
+    return rebuilt
+
+# data structures
+class StructuralIndex(object):
+    '''
+    Assigns structural ids to subterms. Ids are shared by all trees indexed
+    with the same index, and computed without recursion, so arbitrarily deep
+    trees can be indexed.
+    '''
+
+    def __init__(self):
+        self.interned = {}
+        self.ids      = {}
+        self.names    = set()
+
+    def intern(self, node, child_ids):
+        if isinstance(node, ExpressionNode):
+            key = (type(node), get_symbol_name(node), tuple(child_ids))
+        else:
+            key = (type(node), repr(node))
+
+        if isinstance(node, IdentifierNode):
+            self.names.add(node.name)
+
+        return self.interned.setdefault(key, len(self.interned))
+
+    def index(self, root):
+        stack = [(root, False)]
+        while len(stack) > 0:
+            node, expanded = stack.pop()
+
+            # skip nodes that have already been seen
+            if id(node) in self.ids:
+                continue
+
+            # index children first
+            children = get_children(node)
+            if expanded is False and len(children) > 0:
+                stack.append((node, True))
+                stack.extend((child, False) for child in children)
+                continue
+
+            self.ids[id(node)] = self.intern(node, [self.ids[id(c)] for c in children])
+
+        return self.ids[id(root)]
+
+    def __getitem__(self, node):
+        return self.ids[id(node)]
+
+class Sharer(object):
+
+    def __init__(self, ast):
+        self.ast         = ast
+        self.index       = StructuralIndex()
+        self.references  = {}
+        self.counted     = set()
+        self.names       = {}
+        self.definitions = []
+        self.counter     = 0
+
+    def count_references(self, root):
+        stack = [root]
+        while len(stack) > 0:
+            node = stack.pop()
+            sid  = self.index[node]
+
+            # count every reference, but only look inside each distinct subterm once
+            self.references[sid] = self.references.get(sid, 0) + 1
+            if sid in self.counted:
+                continue
+            self.counted.add(sid)
+
+            stack.extend(get_children(node))
+
+    def is_shared(self, node):
+        return is_shareable(node) and self.references.get(self.index[node], 0) > 1
+
+    def new_name(self):
+        while True:
+            name          = '{}{}'.format(SHARED_PREFIX, self.counter)
+            self.counter += 1
+            if name not in self.index.names:
+                return name
+
+    def rewrite(self, root):
+        results = {}
+        stack   = [(root, False)]
+        while len(stack) > 0:
+            node, expanded = stack.pop()
+            sid            = self.index[node]
+
+            # refer to already-lifted subterms by name
+            if sid in self.names:
+                results[id(node)] = IdentifierNode(self.names[sid])
+                continue
+
+            # rewrite children first
+            children = get_children(node)
+            if expanded is False and len(children) > 0:
+                stack.append((node, True))
+                stack.extend((child, False) for child in children)
+                continue
+
+            rewritten = rebuild(node, [results[id(c)] for c in children])
+
+            # lift shared subterms into definitions
+            if self.is_shared(node):
+                name            = self.new_name()
+                self.names[sid] = name
+                definition      = FunctionDefinitionNode(
+                    IdentifierNode(name),
+                    BracketsNode([]),
+                    AtomicSortNode(node.get_sort()),
+                    rewritten
+                )
+                self.definitions.append(definition)
+                rewritten = IdentifierNode(name)
+
+            results[id(node)] = rewritten
+
+        return results[id(root)]
+
+    def share(self):
+
+        # index everything, so that new names don't clash with existing ones
+        for command in self.ast:
+            self.index.index(command)
+
+        # count references in asserts only
+        # NOTE:
+        #      function definitions are left alone because their bodies can
+        #      refer to their parameters
+        for command in self.ast:
+            if isinstance(command, AssertNode):
+                self.count_references(command)
+
+        # rewrite asserts, putting new definitions right before their first use
+        shared = []
+        for command in self.ast:
+            if isinstance(command, AssertNode):
+                command = self.rewrite(command)
+                shared.extend(self.definitions)
+                self.definitions = []
+            shared.append(command)
+
+        return shared
+
+# public API
+def structural_digest(root):
+    '''
+    Get a digest of a subterm's structure. Structurally equal subterms have
+    equal digests, and, practically, no others do. Unlike structural ids,
+    digests can be compared without keeping an index of every subterm.
+    '''
+    digests = {}
+    stack   = [(root, False)]
+    while len(stack) > 0:
+        node, expanded = stack.pop()
+
+        # skip nodes that have already been seen
+        if id(node) in digests:
+            continue
+
+        # digest children first
+        children = get_children(node)
+        if expanded is False and len(children) > 0:
+            stack.append((node, True))
+            stack.extend((child, False) for child in children)
+            continue
+
+        if isinstance(node, ExpressionNode):
+            key = (type(node).__name__, get_symbol_name(node))
+        else:
+            key = (type(node).__name__, repr(node))
+
+        hasher = hashlib.blake2b(repr(key).encode(), digest_size=DIGEST_SIZE)
+        for child in children:
+            hasher.update(digests[id(child)])
+        digests[id(node)] = hasher.digest()
+
+    return digests[id(root)]
+
+def share(ast):
+    return Sharer(ast).share()
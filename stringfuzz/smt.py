@@ -25,7 +25,7 @@ __all__ = [
     'smt_declare_const',
     'smt_check_sat',
     'smt_get_model',
-    'smt_reset_counters',
+    'Counters',
     'smt_str_to_re',
     'smt_regex_in',
     'smt_regex_concat',
@@ -46,9 +46,16 @@ __all__ = [
 VAR_PREFIX   = 'var'
 CONST_PREFIX = 'const'
 
-# globals
-var_counter   = 0
-const_counter = 0
+# data structures
+class Counters(object):
+    '''
+    Numbering for new variables and constants. Every generated problem should
+    get its own, so that problems can be generated concurrently.
+    '''
+
+    def __init__(self):
+        self.var   = 0
+        self.const = 0
 
 # helper functions
 def smt_var(suffix):
@@ -57,24 +64,16 @@ def smt_var(suffix):
 def smt_const(suffix):
     return IdentifierNode('{}{}'.format(CONST_PREFIX, suffix))
 
-def smt_new_var():
-    global var_counter
-    returned = var_counter
-    var_counter += 1
+def smt_new_var(counters):
+    returned      = counters.var
+    counters.var += 1
     return smt_var(returned)
 
-def smt_new_const():
-    global const_counter
-    returned = const_counter
-    const_counter += 1
+def smt_new_const(counters):
+    returned        = counters.const
+    counters.const += 1
     return smt_const(returned)
 
-def smt_reset_counters():
-    global const_counter
-    global var_counter
-    const_counter = 0
-    var_counter = 0
-
 # leaf expressions
 def smt_str_lit(value):
     return StringLitNode(value)
@@ -0,0 +1,314 @@
+'''
+Statistics over whole corpora of problems.
+
+Problems are analysed in a pool of processes. Workers parse and summarise
+their problems, and only send back the summaries, which are a few numbers and
+small histograms, so ASTs never cross process boundaries. Summaries are merged
+into corpus-wide totals, maxima and histograms as they arrive.
+
+Summaries can be kept in an index, a SQLite database, so that later runs over
+a mostly unchanged corpus only analyse the problems that are new or changed.
+A problem's indexed summary is reused if its modification time and size are
+the same as when it was indexed, or, failing that, if its contents hash the
+same.
+'''
+
+import os
+import csv
+import json
+import sqlite3
+import hashlib
+import multiprocessing
+
+from collections import namedtuple, Counter
+
+from stringfuzz.analyser import summarise, SUMMED_STATS, MAXIMUM_STATS, HISTOGRAM_STATS
+from stringfuzz.batch import PROBLEM_ERRORS
+from stringfuzz.corpus import TASKS_PER_WORKER
+from stringfuzz.parser import parse_file
+
+__all__ = [
+    'Aggregate',
+    'StatsIndex',
+    'analyse_problems',
+    'write_json',
+    'write_csv',
+    'CSV_FIELDS',
+    'TOTAL_NAME',
+]
+
+# constants
+TOTAL_NAME = '(total)'
+CSV_FIELDS = ['file'] + SUMMED_STATS + MAXIMUM_STATS + ['error']
+
+HASH_BLOCK_SIZE = 2**16
+COMMIT_INTERVAL = 1000
+
+INDEX_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS summaries (
+    path     TEXT    NOT NULL,
+    language TEXT    NOT NULL,
+    mtime    INTEGER NOT NULL,
+    size     INTEGER NOT NULL,
+    sha256   TEXT    NOT NULL,
+    summary  TEXT    NOT NULL,
+    PRIMARY KEY (path, language)
+)
+'''
+
+# data structures
+StatsTask = namedtuple('StatsTask', ('path', 'file', 'language', 'digest'))
+FileKey   = namedtuple('FileKey', ('path', 'mtime', 'size'))
+
+class Aggregate(object):
+    '''
+    Corpus-wide stats, merged from the summaries of each problem.
+    '''
+
+    def __init__(self):
+        self.problems   = 0
+        self.failed     = 0
+        self.totals     = dict.fromkeys(SUMMED_STATS, 0)
+        self.maxima     = dict.fromkeys(MAXIMUM_STATS, 0)
+        self.histograms = {name: Counter() for name in HISTOGRAM_STATS}
+
+    def add(self, record):
+        '''
+        Merge in one problem's record, skipping ones that failed.
+        '''
+        if 'error' in record:
+            self.failed += 1
+            return
+
+        self.problems += 1
+        for name in SUMMED_STATS:
+            self.totals[name] += record[name]
+        for name in MAXIMUM_STATS:
+            self.maxima[name] = max(self.maxima[name], record[name])
+        for name in HISTOGRAM_STATS:
+            self.histograms[name].update(record[name])
+
+    def to_dict(self):
+        stats = {
+            'problems': self.problems,
+            'failed':   self.failed,
+        }
+        stats.update(self.totals)
+        stats.update(self.maxima)
+        stats.update((name, dict(histogram)) for name, histogram in self.histograms.items())
+        return stats
+
+class StatsIndex(object):
+    '''
+    An index of problems' summaries, in a SQLite database at path. Summaries
+    are indexed by the real path of their problem and the language it was
+    parsed as.
+    '''
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(INDEX_SCHEMA)
+        self.uncommitted = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get_key(self, path):
+        '''
+        Get the key of the file at path as it is now, or None if it can't be
+        read.
+        '''
+        try:
+            status = os.stat(path)
+        except OSError:
+            return None
+        return FileKey(os.path.realpath(path), status.st_mtime_ns, status.st_size)
+
+    def lookup(self, key, language):
+        '''
+        Get the indexed record of the file with key, without its name, or
+        None if it isn't indexed or has changed since it was indexed.
+        '''
+        row = self.connection.execute(
+            'SELECT mtime, size, sha256, summary FROM summaries WHERE path = ? AND language = ?',
+            (key.path, language)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        mtime, size, sha256, summary = row
+
+        # a file that was only touched has the same contents, so re-date it
+        if (mtime, size) != (key.mtime, key.size):
+            try:
+                if hash_file(key.path) != sha256:
+                    return None
+            except OSError:
+                return None
+            self.connection.execute(
+                'UPDATE summaries SET mtime = ?, size = ? WHERE path = ? AND language = ?',
+                (key.mtime, key.size, key.path, language)
+            )
+            self.count_change()
+
+        return decode_summary(summary, sha256)
+
+    def store(self, key, language, record):
+        '''
+        Index a problem's record, as of key.
+        '''
+        self.connection.execute(
+            'INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?, ?)',
+            (key.path, language, key.mtime, key.size, record['sha256'], encode_summary(record))
+        )
+        self.count_change()
+
+    def records(self, language):
+        '''
+        Get the records of every problem indexed for language, without
+        checking them against their files, in order of path.
+        '''
+        rows = self.connection.execute(
+            'SELECT path, sha256, summary FROM summaries WHERE language = ? ORDER BY path',
+            (language,)
+        )
+        for path, sha256, summary in rows:
+            yield dict(decode_summary(summary, sha256), file=path)
+
+    def count_change(self):
+        self.uncommitted += 1
+        if self.uncommitted >= COMMIT_INTERVAL:
+            self.commit()
+
+    def commit(self):
+        self.connection.commit()
+        self.uncommitted = 0
+
+    def close(self):
+        self.commit()
+        self.connection.close()
+
+# helpers
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+# NOTE:
+#      JSON only has string keys, so histograms are stored as lists of pairs
+#      to keep their numeric keys numeric
+def encode_summary(record):
+    summary = {}
+    for name, value in record.items():
+        if name in HISTOGRAM_STATS:
+            summary[name] = list(value.items())
+        elif name not in ('file', 'sha256'):
+            summary[name] = value
+    return json.dumps(summary, sort_keys=True)
+
+def decode_summary(text, sha256):
+    record = json.loads(text)
+    for name in HISTOGRAM_STATS:
+        record[name] = dict(record[name])
+    record['sha256'] = sha256
+    return record
+
+def analyse_problem(task):
+    record = {'file': task.file}
+    try:
+        if task.digest is True:
+            record['sha256'] = hash_file(task.path)
+        record.update(summarise(parse_file(task.path, task.language)))
+    except PROBLEM_ERRORS as e:
+        record['error'] = '{}: {}'.format(type(e).__name__, e)
+    return record
+
+def run_stats(tasks, jobs):
+
+    # run in this process if there's only one job, or nothing to do
+    if jobs < 2 or len(tasks) == 0:
+        yield from map(analyse_problem, tasks)
+        return
+
+    # give each worker a few chunks, so that the work stays balanced
+    chunk_size = max(1, len(tasks) // (jobs * TASKS_PER_WORKER))
+    with multiprocessing.Pool(jobs) as pool:
+        yield from pool.imap(analyse_problem, tasks, chunk_size)
+
+def analyse_indexed(tasks, jobs, index):
+
+    # look each problem up, and only analyse the ones that aren't indexed
+    keys    = [index.get_key(task.path) for task in tasks]
+    found   = [None if key is None else index.lookup(key, task.language) for task, key in zip(tasks, keys)]
+    missing = [task for task, record in zip(tasks, found) if record is None]
+    results = run_stats(missing, jobs)
+
+    try:
+        for task, key, record in zip(tasks, keys, found):
+            if record is not None:
+                yield dict(record, file=task.file)
+                continue
+
+            # index new records, unless they couldn't be made
+            record = next(results)
+            if key is not None and 'error' not in record:
+                index.store(key, task.language, record)
+            yield record
+    finally:
+        results.close()
+        index.commit()
+
+# public API
+def analyse_problems(problems, language, jobs, index=None):
+    '''
+    Summarise problems, pairs of paths and relative paths, using jobs
+    processes. Returns an iterator over a record for each problem, in order:
+    its summary, or the error that stopped it from being summarised. If a
+    StatsIndex is given, summaries of unchanged problems are taken from it,
+    the others are added to it, and records include their problem's SHA-256.
+    '''
+    digest = index is not None
+    tasks  = [StatsTask(path, relative_path, language, digest) for path, relative_path in problems]
+
+    if index is not None:
+        return analyse_indexed(tasks, jobs, index)
+    return run_stats(tasks, jobs)
+
+def write_json(records, stream):
+    '''
+    Write records, and their aggregate, as one JSON object, writing each
+    record as it comes. Returns the aggregate.
+    '''
+    aggregate = Aggregate()
+    stream.write('{"problems": [')
+    for i, record in enumerate(records):
+        aggregate.add(record)
+        stream.write(',\n' if i > 0 else '\n')
+        stream.write(json.dumps(record, sort_keys=True))
+    stream.write('\n], "total": ')
+    stream.write(json.dumps(aggregate.to_dict(), sort_keys=True))
+    stream.write('}\n')
+    return aggregate
+
+def write_csv(records, stream):
+    '''
+    Write records as CSV rows, without their histograms, followed by a row of
+    their totals and maxima. Returns the aggregate.
+    '''
+    aggregate = Aggregate()
+    writer    = csv.DictWriter(stream, CSV_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    for record in records:
+        aggregate.add(record)
+        writer.writerow(record)
+
+    total         = aggregate.to_dict()
+    total['file'] = TOTAL_NAME
+    writer.writerow(total)
+    return aggregate
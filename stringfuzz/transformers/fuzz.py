@@ -9,15 +9,15 @@ are processed character by character. Each character can either
 remain in the updated string, be replaced by a random string,
 or be deleted with equal probability.
 
-Operators are fuzzed, with 50% probability, to a new operator
-with the same function type. For example, regex * can be fuzzed
-to regex +.
+Operators are fuzzed, with probability given by the mutation rate,
+to a random operator with the same function type. For example,
+regex * can be fuzzed to regex +.
 '''
 
 import random
 
 from stringfuzz.ast import IntLitNode, StringLitNode, ReRangeNode
-from stringfuzz.types import REPLACEABLE_OPS
+from stringfuzz.types import REPLACEMENTS
 from stringfuzz.ast_walker import ASTWalker
 from stringfuzz.generators import random_text
 
@@ -25,33 +25,52 @@ __all__ = [
     'fuzz',
 ]
 
-def fuzz_char(c):
+# constants
+REPLACE = 'replace'
+KEEP    = 'keep'
+ADD     = 'add'
+DELETE  = 'delete'
 
-    # with equal probability: replace, keep, add, or delete a character
-    operation = random.randint(1,4)
+OPERATIONS = [REPLACE, KEEP, ADD, DELETE]
 
-    # replace it
-    if operation == 1:
-        return random_text(1)
+DEFAULT_MUTATION_RATE = 1.0
 
-    # keep it the same
-    if operation == 2:
-        return c
+# helpers
+def fuzz_string(string, rng):
 
-    # add a new character
-    if operation == 3:
-        return c + random_text(1)
+    # with equal probability: replace, keep, add, or delete each character
+    operations = rng.choices(OPERATIONS, k=len(string))
 
-    # delete it
-    return ''
+    # make all the new characters at once
+    num_new   = sum(1 for operation in operations if operation == REPLACE or operation == ADD)
+    new_chars = iter(random_text(num_new, rng=rng))
 
-def fuzz_string(string):
-    return ''.join(fuzz_char(c) for c in string)
+    pieces = []
+    for c, operation in zip(string, operations):
+
+        # replace it
+        if operation == REPLACE:
+            pieces.append(next(new_chars))
+
+        # keep it the same
+        elif operation == KEEP:
+            pieces.append(c)
+
+        # add a new character
+        elif operation == ADD:
+            pieces.append(c)
+            pieces.append(next(new_chars))
+
+        # delete it
+
+    return ''.join(pieces)
 
 class LitTransformer(ASTWalker):
-    def __init__(self, ast, skip_re_range):
+    def __init__(self, ast, skip_re_range, mutation_rate, rng):
         super().__init__(ast)
         self.skip_re_range = skip_re_range
+        self.mutation_rate = mutation_rate
+        self.rng           = rng
 
     def exit_literal(self, literal, parent):
 
@@ -59,7 +78,7 @@ class LitTransformer(ASTWalker):
         if isinstance(literal, IntLitNode):
 
             # maintain sign of literal
-            literal.value += random.randint(-literal.value, literal.value)
+            literal.value += self.rng.randint(-literal.value, literal.value)
 
         # string literal
         elif isinstance(literal, StringLitNode):
@@ -69,22 +88,21 @@ class LitTransformer(ASTWalker):
                 return
 
             # create new value for literal
-            new_val = fuzz_string(literal.value)
+            new_val = fuzz_string(literal.value, self.rng)
 
             # replace old value with new value
             literal.value = new_val
 
     def exit_expression(self, expr, parent):
-        for type_list in REPLACEABLE_OPS:
-            for i in range(len(expr.body)):
+        for i, arg in enumerate(expr.body):
 
-                # check if it's a replaceable type; if so, randomly replace it
-                replaceable = [isinstance(expr.body[i], C) for C in type_list]
-                if any(replaceable):
-                    choice       = random.choice(type_list)
-                    expr.body[i] = choice(*expr.body[i].body)
+            # check if it's a replaceable type; if so, randomly replace it
+            group = REPLACEMENTS.get(type(arg))
+            if group is not None and self.rng.random() < self.mutation_rate:
+                choice       = self.rng.choice(group)
+                expr.body[i] = choice(*arg.body)
 
 # public API
-def fuzz(ast, skip_re_range):
-    transformed = LitTransformer(ast, skip_re_range).walk()
+def fuzz(ast, skip_re_range, mutation_rate=DEFAULT_MUTATION_RATE, rng=random):
+    transformed = LitTransformer(ast, skip_re_range, mutation_rate, rng).walk()
     return transformed
@@ -1,6 +1,10 @@
 '''
 The graft transform picks a subtree and a leaf at random
 and swaps them for each type.
+
+The finder records exactly where each picked node is (its parent and its
+index in the parent's body), so the swaps are done in place, by identity,
+without walking the AST again.
 '''
 
 import random
@@ -13,23 +17,60 @@ __all__ = [
     'graft',
 ]
 
-class GraftTransformer(ASTWalker):
-    def __init__(self, ast, pairs):
-        super().__init__(ast)
-        self.pairs = pairs
+# helpers
+def get_slot(node, parent):
+    for i, child in enumerate(parent.body):
+        if child is node:
+            return i
+    raise ValueError('{!r} is not a child of {!r}'.format(node, parent))
 
-    def enter_expression(self, expr, parent):
-        for i in range(len(expr.body)):
-            for pair in self.pairs:
-                if expr.body[i] == pair[0]:
-                    expr.body[i] = pair[1]
-                elif expr.body[i] == pair[1]:
-                    expr.body[i] = pair[0]
+def swap(first, second):
+
+    # if one node is inside the other, it just replaces the other
+    if first.contains(second):
+        first.parent.body[first.slot] = second.node
+    elif second.contains(first):
+        second.parent.body[second.slot] = first.node
+
+    # find both slots before changing either, since they can share a parent
+    else:
+        first_slot                      = first.slot
+        second_slot                     = second.slot
+        first.parent.body[first_slot]   = second.node
+        second.parent.body[second_slot] = first.node
+
+# data structures
+class Location(object):
+    '''
+    Where a node is in the AST: its parent, its index in the parent's body,
+    and the positions in the walk that it spans.
+    '''
+
+    def __init__(self, node, parent, start):
+        self.node   = node
+        self.parent = parent
+        self.start  = start
+        self.end    = None
+
+    @property
+    def slot(self):
+        return get_slot(self.node, self.parent)
+
+    def close(self, end):
+        self.end = end
+
+    def contains(self, other):
+        return self.start <= other.start and other.end <= self.end
+
+    def overlaps(self, other):
+        return self.start <= other.end and other.start <= self.end
 
 class GraftFinder(ASTWalker):
-    def __init__(self, ast, skip_str_to_re):
+    def __init__(self, ast, skip_str_to_re, rng):
         super().__init__(ast)
         self.skip_str_to_re = skip_str_to_re
+        self.rng            = rng
+        self.position       = 0
         #            expr, lit
         self.str  = [None, None]
         self.bool = [None, None]
@@ -49,30 +90,41 @@ class GraftFinder(ASTWalker):
             pairs.append(self.rx)
         return pairs
 
+    @property
+    def locations(self):
+        return self.str + self.bool + self.int + self.rx
+
+    def locate(self, node, parent):
+        return Location(node, parent, self.position)
+
     def enter_literal(self, literal, parent):
-        replace = random.choice([True, False])
+        self.position += 1
+        replace        = self.rng.choice([True, False])
+        location       = self.locate(literal, parent)
+        location.close(self.position)
         if isinstance(literal, StringLitNode):
             if isinstance(parent, StrToReNode) and self.skip_str_to_re:
                 return
             if self.str[1]:
                 if replace:
-                    self.str[1] = literal
+                    self.str[1] = location
             else:
-                self.str[1] = literal
+                self.str[1] = location
         elif isinstance(literal, BoolLitNode):
             if self.bool[1]:
                 if replace:
-                    self.bool[1] = literal
+                    self.bool[1] = location
             else:
-                self.bool[1] = literal
+                self.bool[1] = location
         elif isinstance(literal, IntLitNode):
             if self.int[1]:
                 if replace:
-                    self.int[1] = literal
+                    self.int[1] = location
             else:
-                self.int[1] = literal
+                self.int[1] = location
 
     def enter_identifier(self, ident, parent):
+        self.position += 1
         #TODO How to check type of identifiers?
         # if self.str[1]:
         #     if random.random() < 0.5:
@@ -82,45 +134,68 @@ class GraftFinder(ASTWalker):
         pass
 
     def enter_expression(self, expr, parent):
-        replace = random.choice([True, False])
+        self.position += 1
+        replace        = self.rng.choice([True, False])
+
+        # commands have no parent, and are never picked
+        if parent is None:
+            return
+
+        location = self.locate(expr, parent)
         if isinstance(expr, StrToReNode):
             # take StrToReNode's to be literals for RX
             if self.rx[1]:
                 if replace:
-                    self.rx[1] = expr
+                    self.rx[1] = location
             else:
-                self.rx[1] = expr
+                self.rx[1] = location
 
         # assign expr part of pair
         elif any([isinstance(expr, C) for C in STR_RET]):
             if self.str[0]:
                 if replace:
-                    self.str[0] = expr
+                    self.str[0] = location
             else:
-                self.str[0] = expr
+                self.str[0] = location
         elif any([isinstance(expr, C) for C in INT_RET]):
             if self.int[0]:
                 if replace:
-                    self.int[0] = expr
+                    self.int[0] = location
             else:
-                self.int[0] = expr
+                self.int[0] = location
         elif any([isinstance(expr, C) for C in BOOL_RET]):
             if self.bool[0]:
                 if replace:
-                    self.bool[0] = expr
+                    self.bool[0] = location
             else:
-                self.bool[0] = expr
+                self.bool[0] = location
         elif any([isinstance(expr, C) for C in RX_RET]):
             if self.rx[0]:
                 if replace:
-                    self.rx[0] = expr
+                    self.rx[0] = location
             else:
-                self.rx[0] = expr
+                self.rx[0] = location
+
+    def exit_expression(self, expr, parent):
 
+        # close the spans of picked expressions
+        for location in self.locations:
+            if location is not None and location.node is expr and location.end is None:
+                location.close(self.position)
 
 # public API
-def graft(ast, skip_str_to_re):
-    finder = GraftFinder(ast, skip_str_to_re)
+def graft(ast, skip_str_to_re, rng=random):
+    finder = GraftFinder(ast, skip_str_to_re, rng)
     finder.walk()
-    transformed = GraftTransformer(ast, finder.pairs).walk()
-    return transformed
+
+    # NOTE:
+    #      pairs that overlap already-grafted ones are skipped, because the
+    #      earlier grafts have moved their nodes around
+    grafted = []
+    for expr, lit in finder.pairs:
+        if any(location.overlaps(other) for location in [expr, lit] for other in grafted):
+            continue
+        swap(expr, lit)
+        grafted.extend([expr, lit])
+
+    return ast
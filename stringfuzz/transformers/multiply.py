@@ -27,7 +27,10 @@ class MultiplyTransformer(ASTWalker):
         elif isinstance(literal, IntLitNode):
             literal.value = literal.value * self.factor
 
+def make_multiplier(ast, factor, skip_re_range):
+    return MultiplyTransformer(ast, factor, skip_re_range)
+
 # public API
 def multiply(ast, factor, skip_re_range):
-    transformed = MultiplyTransformer(ast, factor, skip_re_range).walk()
+    transformed = make_multiplier(ast, factor, skip_re_range).walk()
     return transformed
@@ -17,14 +17,14 @@ WITH_INTEGERS    = list(ALL_CHARS)
 WITHOUT_INTEGERS = [c for c in ALL_CHARS if not c.isdecimal()]
 
 class TranslateTransformer(ASTWalker):
-    def __init__(self, ast, character_set, skip_re_range):
+    def __init__(self, ast, character_set, skip_re_range, rng):
         super().__init__(ast)
-        self.table = self.make_table(character_set)
+        self.table = self.make_table(character_set, rng)
         self.skip_re_range = skip_re_range
 
-    def make_table(self, character_set):
+    def make_table(self, character_set, rng):
         shuffled = copy.copy(character_set)
-        random.shuffle(shuffled)
+        rng.shuffle(shuffled)
         shuffled = ''.join(shuffled)
         character_set = ''.join(character_set)
         return str.maketrans(character_set, shuffled)
@@ -35,11 +35,14 @@ class TranslateTransformer(ASTWalker):
                 return
             literal.value = literal.value.translate(self.table)
 
-# public API
-def translate(ast, integer_flag, skip_re_range):
+def make_translator(ast, integer_flag, skip_re_range, rng=random):
     if integer_flag:
         character_set = WITH_INTEGERS
     else:
         character_set = WITHOUT_INTEGERS
-    transformed = TranslateTransformer(ast, character_set, skip_re_range).walk()
+    return TranslateTransformer(ast, character_set, skip_re_range, rng)
+
+# public API
+def translate(ast, integer_flag, skip_re_range, rng=random):
+    transformed = make_translator(ast, integer_flag, skip_re_range, rng).walk()
     return transformed
@@ -20,15 +20,13 @@ ALL_CHARS         = string.printable
 #     exit(1)
 
 # TODO:
-#      fix pick_unprintable to pick without replacement
-def pick_unprintable():
-    return random.choice(UNPRINTABLE_CHARS)
-
-def make_charmap():
-    return {c : pick_unprintable() for c in ALL_CHARS}
+#      fix make_charmap to pick without replacement
+def make_charmap(rng):
+    picked = rng.choices(UNPRINTABLE_CHARS, k=len(ALL_CHARS))
+    return str.maketrans(dict(zip(ALL_CHARS, picked)))
 
 def make_unprintable_string(s, charmap):
-    return ''.join(charmap[c] for c in s)
+    return s.translate(charmap)
 
 def make_unprintable_expression(expression, charmap):
 
@@ -51,8 +49,8 @@ def make_unprintable_expression(expression, charmap):
             expression.body[i] = StringLitNode(new_string)
 
 # public API
-def unprintable(ast):
-    charmap = make_charmap()
+def unprintable(ast, rng=random):
+    charmap = make_charmap(rng)
 
     for expression in ast:
         make_unprintable_expression(expression, charmap)
@@ -25,6 +25,9 @@ INT_INT_RX      = [ReRangeNode]
 # types with more than one inhabitant for fuzzing
 REPLACEABLE_OPS = [STR_STR_BOOL, STR_INT, RX_RX_RX, RX_RX]
 
+# the group of operators that each replaceable operator can be replaced by
+REPLACEMENTS    = {op: group for group in REPLACEABLE_OPS for op in group}
+
 # all the same argument types for rotating
 ALL_STR_ARGS    = STR_STR_STR_STR + STR_STR_STR + STR_STR_INT + STR_STR_BOOL + STR_INT + STR_RX
 ALL_RX_ARGS     = RX_RX_RX + RX_RX
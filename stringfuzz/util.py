@@ -1,4 +1,6 @@
 import random
+import hashlib
+import functools
 
 from stringfuzz.scanner import ALPHABET
 from stringfuzz.ast import ConcatNode, ReConcatNode
@@ -6,16 +8,83 @@ from stringfuzz.ast import ConcatNode, ReConcatNode
 __all__ = [
     'coin_toss',
     'random_string',
+    'random_strings',
     'join_terms_with',
     'all_same',
+    'instance_seed',
 ]
 
+# constants
+# NOTE:
+#      random characters are drawn in chunks so that the random bytes for a
+#      huge string are never held in memory all at once
+CHUNK_SIZE = 2 ** 16
+NUM_BYTES  = 256
+
+# helpers
+@functools.lru_cache(maxsize=None)
+def get_byte_table(alphabet):
+    '''
+    Make a bytes.translate table that maps random bytes uniformly onto the
+    alphabet: bytes below the biggest multiple of its size map onto it, and
+    the rest are to be deleted. Returns None if the alphabet doesn't fit in
+    a byte.
+    '''
+    size = len(alphabet)
+    if size > NUM_BYTES or any(ord(c) >= NUM_BYTES for c in alphabet):
+        return None
+
+    limit   = NUM_BYTES - NUM_BYTES % size
+    table   = bytes(ord(alphabet[b % size]) for b in range(limit)) + bytes(NUM_BYTES - limit)
+    deleted = bytes(range(limit, NUM_BYTES))
+    return table, deleted
+
 # public API
-def coin_toss():
-    return random.choice([True, False])
+def coin_toss(rng=random):
+    return rng.choice([True, False])
+
+def random_string(length, rng=random, alphabet=ALPHABET):
+    '''
+    Make a random string of characters from the alphabet. Characters are
+    made in bulk, from random bytes, rather than drawn one at a time.
+    '''
+    byte_table = get_byte_table(alphabet)
+
+    # fall back to drawing characters for big alphabets
+    if byte_table is None:
+        return ''.join(rng.choices(alphabet, k=length))
+
+    table, deleted = byte_table
+    chunks         = []
+    remaining      = length
+    while remaining > 0:
+        num_bytes = min(CHUNK_SIZE, remaining)
+        data      = rng.getrandbits(8 * num_bytes).to_bytes(num_bytes, 'little')
+        chunk     = data.translate(table, deleted)
+        chunks.append(chunk.decode('latin-1'))
+        remaining -= len(chunk)
+
+    return ''.join(chunks)
+
+def random_strings(count, length, rng=random, alphabet=ALPHABET):
+    '''
+    Make count random strings of the same length, drawing all their
+    characters at once.
+    '''
+    if length == 0:
+        return [''] * count
+
+    text = random_string(count * length, rng, alphabet)
+    return [text[i:i + length] for i in range(0, count * length, length)]
 
-def random_string(length):
-    return ''.join(random.choice(ALPHABET) for i in range(length))
+def instance_seed(seed, index):
+    '''
+    Derive the seed of the index-th instance made from a given seed, so that
+    any instance can be made on its own, without making the ones before it.
+    '''
+    key    = '{}/{}'.format(seed, index).encode()
+    digest = hashlib.sha256(key).digest()
+    return int.from_bytes(digest[:8], 'big')
 
 def join_terms_with(terms, concatenator):
     assert len(terms) > 0
@@ -0,0 +1,86 @@
+import os
+import gzip
+import random
+import unittest
+import tempfile
+
+from stringfuzz.batch import find_problems, transform_problems
+from stringfuzz.constants import SMT_25_STRING
+from stringfuzz.corpus import Transformation
+from stringfuzz.pipeline import Stage
+from stringfuzz.transformers import translate
+
+PROBLEM = '(declare-fun x () String)\n(assert (= x "abc"))\n'
+
+TRANSFORMATION = Transformation(
+    name        = 'translate',
+    stages      = [Stage(translate, {'integer_flag': False, 'skip_re_range': True, 'rng': random.Random(0)})],
+    language    = SMT_25_STRING,
+    share       = False,
+)
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as file:
+        file.write(data)
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.suite     = os.path.join(self.directory.name, 'suite')
+        self.out_dir   = os.path.join(self.directory.name, 'out')
+
+        write(os.path.join(self.suite, 'a.smt2'), PROBLEM.encode())
+        write(os.path.join(self.suite, 'bad.smt2'), b'(assert (')
+        write(os.path.join(self.suite, 'notes.txt'), b'not a problem')
+        write(os.path.join(self.suite, 'deeper', 'b.smt2.gz'), gzip.compress(PROBLEM.encode()))
+        write(os.path.join(self.suite, 'deeper', 'c.smt2'), PROBLEM.encode())
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_find_problems(self):
+        relative_paths = [relative_path for path, relative_path in find_problems([self.suite])]
+        self.assertEqual(relative_paths, ['a.smt2', 'bad.smt2', os.path.join('deeper', 'b.smt2.gz'), os.path.join('deeper', 'c.smt2')])
+
+        # globs are relative to their last directory without wildcards
+        pattern = os.path.join(self.suite, '*', '*.smt2')
+        self.assertEqual(find_problems([pattern]), [(os.path.join(self.suite, 'deeper', 'c.smt2'), os.path.join('deeper', 'c.smt2'))])
+
+    def test_errors_are_reported(self):
+        problems = find_problems([self.suite])
+        records  = list(transform_problems(problems, TRANSFORMATION, SMT_25_STRING, 0, self.out_dir, 1))
+
+        self.assertEqual([r['index'] for r in records], list(range(4)))
+        self.assertIn('ParsingError', records[1]['error'])
+        for record in records[:1] + records[2:]:
+            self.assertNotIn('error', record)
+            self.assertTrue(os.path.isfile(os.path.join(self.out_dir, record['file'])))
+
+        # compressed inputs are written out plain
+        self.assertEqual(records[2]['file'], os.path.join('deeper', 'b.smt2'))
+
+    def test_truncated_problems_are_reported(self):
+        write(os.path.join(self.suite, 'deeper', 'd.smt2.gz'), gzip.compress(PROBLEM.encode())[:20])
+        problems = find_problems([self.suite])
+
+        for jobs in [1, 2]:
+            records = list(transform_problems(problems, TRANSFORMATION, SMT_25_STRING, 0, self.out_dir, jobs))
+            self.assertEqual(len(records), 5)
+            self.assertIn('EOFError', records[4]['error'])
+
+    def test_parallel_matches_serial(self):
+        problems = find_problems([self.suite])
+        serial   = list(transform_problems(problems, TRANSFORMATION, SMT_25_STRING, 0, self.out_dir, 1))
+        parallel = list(transform_problems(problems, TRANSFORMATION, SMT_25_STRING, 0, self.out_dir, 2))
+        self.assertEqual(serial, parallel)
+
+    def test_clashing_outputs(self):
+        write(os.path.join(self.suite, 'deeper', 'c.smt2.xz'), b'')
+        problems = find_problems([self.suite])
+        with self.assertRaises(ValueError):
+            transform_problems(problems, TRANSFORMATION, SMT_25_STRING, 0, self.out_dir, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import io
+import os
+import unittest
+import tempfile
+
+from stringfuzz.compression import *
+from stringfuzz.constants import SMT_25_STRING
+from stringfuzz.parser import parse, parse_file
+
+TEXT = '(declare-fun x () String)\n(assert (= x "abc"))\n(check-sat)\n'
+
+class TestCompression(unittest.TestCase):
+
+    def write(self, directory, compression):
+        path = os.path.join(directory, 'problem.smt2' + get_extension(compression))
+        with open(path, 'wb') as file:
+            file.write(compress(TEXT.encode(), compression))
+        return path
+
+    def test_read_compressed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for compression in COMPRESSIONS:
+                path = self.write(directory, compression)
+                self.assertEqual(read_text(path), TEXT)
+                self.assertEqual(parse_file(path, SMT_25_STRING), parse(TEXT, SMT_25_STRING))
+
+    def test_detect_compression(self):
+        for compression in COMPRESSIONS:
+            self.assertEqual(detect_compression(compress(TEXT.encode(), compression)), compression)
+
+    def test_deterministic(self):
+        for compression in COMPRESSIONS:
+            self.assertEqual(compress(TEXT.encode(), compression), compress(TEXT.encode(), compression))
+
+    def test_open_output(self):
+        for compression in COMPRESSIONS:
+            stream = io.TextIOWrapper(io.BytesIO(), encoding='utf-8')
+            with open_output(stream, compression) as output:
+                output.write(TEXT)
+            stream.flush()
+
+            data = stream.buffer.getvalue()
+            self.assertEqual(detect_compression(data), compression)
+            if compression != NO_COMPRESSION:
+                self.assertNotEqual(data, TEXT.encode())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import os
+import random
+import hashlib
+import unittest
+import tempfile
+
+from stringfuzz.constants import SMT_25_STRING
+from stringfuzz.corpus import Recipe, Transformation, make_problem, make_corpus, make_sweep, make_variants, parse_sweep, make_points
+from stringfuzz.generator import generate
+from stringfuzz.generators import lengths
+from stringfuzz.parser import parse
+from stringfuzz.pipeline import Stage, run_pipeline
+from stringfuzz.transformers import translate, fuzz
+
+RECIPE = Recipe(
+    name           = 'lengths',
+    generator      = lengths,
+    parameters     = {
+        'num_vars':         4,
+        'min_length':       0,
+        'max_length':       10,
+        'num_concats':      2,
+        'random_relations': True,
+    },
+    language       = SMT_25_STRING,
+    produce_models = False,
+    share          = False,
+)
+
+class TestCorpus(unittest.TestCase):
+
+    def make(self, jobs):
+        with tempfile.TemporaryDirectory() as out_dir:
+            records = list(make_corpus(RECIPE, 3, 6, out_dir, jobs))
+            texts   = {}
+            for record in records:
+                with open(os.path.join(out_dir, record['file']), 'rb') as file:
+                    texts[record['file']] = file.read()
+            return records, texts
+
+    def test_manifest(self):
+        records, texts = self.make(jobs=1)
+
+        self.assertEqual([r['index'] for r in records], list(range(6)))
+        for record in records:
+            data = texts[record['file']]
+            self.assertEqual(record['size'], len(data))
+            self.assertEqual(record['sha256'], hashlib.sha256(data).hexdigest())
+
+    def test_instances_are_independent(self):
+        records, texts = self.make(jobs=1)
+
+        for record in records:
+            remade = make_problem(RECIPE, random.Random(record['seed'])) + '\n'
+            self.assertEqual(remade.encode(), texts[record['file']])
+
+    def test_parallel_matches_serial(self):
+        self.assertEqual(self.make(jobs=1), self.make(jobs=2))
+
+class TestSweep(unittest.TestCase):
+
+    def test_parse_sweep(self):
+        self.assertEqual(parse_sweep('num_vars=1,3,5'),        ('num_vars', [1, 3, 5]))
+        self.assertEqual(parse_sweep('--num-vars=1:7:3'),      ('num_vars', [1, 4, 7]))
+        self.assertEqual(parse_sweep('depth=1:100:*10'),       ('depth', [1, 10, 100]))
+        self.assertEqual(parse_sweep('p=0.1:0.3:0.1', float), ('p', [0.1, 0.2, 0.3]))
+
+        for bad in ['depth', 'depth=1:5:0', 'depth=1:5:*1', 'depth=1:2:3:4']:
+            with self.assertRaises(ValueError):
+                parse_sweep(bad)
+
+    def test_sweep(self):
+        points = make_points([('num_vars', [4, 5]), ('max_length', [5, 10])])
+        self.assertEqual(len(points), 4)
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            records = list(make_sweep(RECIPE, points, 3, 2, out_dir, jobs=1))
+
+        self.assertEqual([r['index'] for r in records], list(range(8)))
+        for record in records:
+            point = points[record['index'] // 2]
+            self.assertEqual(record['point'], point)
+            self.assertEqual(record['parameters'], dict(RECIPE.parameters, **point))
+
+SEED_PROBLEM = '(declare-fun x () String)\n(assert (= x (str.++ "abc" (str.at x 2))))'
+
+TRANSFORMATION = Transformation(
+    name        = 'translate-fuzz',
+    stages      = [
+        Stage(translate, {'integer_flag': False, 'skip_re_range': True, 'rng': random.Random(0)}),
+        Stage(fuzz, {'skip_re_range': True, 'rng': random.Random(0)}),
+    ],
+    language    = SMT_25_STRING,
+    share       = False,
+)
+
+class TestVariants(unittest.TestCase):
+
+    def make(self, jobs):
+        ast = parse(SEED_PROBLEM, SMT_25_STRING)
+        with tempfile.TemporaryDirectory() as out_dir:
+            records = list(make_variants(ast, TRANSFORMATION, 3, 6, out_dir, jobs))
+            texts   = {}
+            for record in records:
+                with open(os.path.join(out_dir, record['file'])) as file:
+                    texts[record['file']] = file.read()
+
+        # the seed problem is left alone
+        self.assertEqual(generate(ast, SMT_25_STRING), SEED_PROBLEM)
+        return records, texts
+
+    def test_variants_are_independent(self):
+        records, texts = self.make(jobs=1)
+
+        self.assertEqual([r['index'] for r in records], list(range(6)))
+        self.assertGreater(len(set(texts.values())), 1)
+        for record in records:
+
+            # each variant is what one run with its seed makes
+            rng    = random.Random(record['seed'])
+            stages = [Stage(s.transformer, dict(s.arguments, rng=rng)) for s in TRANSFORMATION.stages]
+            remade = run_pipeline(parse(SEED_PROBLEM, SMT_25_STRING), stages)
+            self.assertEqual(generate(remade, SMT_25_STRING) + '\n', texts[record['file']])
+
+    def test_parallel_matches_serial(self):
+        self.assertEqual(self.make(jobs=1), self.make(jobs=2))
+
+if __name__ == '__main__':
+    unittest.main()
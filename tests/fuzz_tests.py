@@ -0,0 +1,45 @@
+import random
+import unittest
+
+from stringfuzz.ast import *
+from stringfuzz.constants import SMT_25_STRING
+from stringfuzz.parser import parse
+from stringfuzz.types import REPLACEMENTS
+from stringfuzz.transformers import fuzz
+
+PROBLEM = '''
+(declare-fun x () String)
+(assert (str.in.re x (re.* (re.union (str.to.re "a") (str.to.re "b")))))
+(assert (str.contains x (str.substr x 0 (str.len x))))
+'''
+
+def get_operators(ast):
+    operators = []
+    stack     = list(ast)
+    while len(stack) > 0:
+        node = stack.pop()
+        if isinstance(node, ExpressionNode):
+            operators.append(type(node))
+            stack.extend(node.body)
+    return operators
+
+class TestFuzz(unittest.TestCase):
+
+    def test_no_mutations(self):
+        original = parse(PROBLEM, SMT_25_STRING)
+        fuzzed   = fuzz(parse(PROBLEM, SMT_25_STRING), True, mutation_rate=0.0, rng=random.Random(1))
+        self.assertListEqual(get_operators(fuzzed), get_operators(original))
+
+    def test_replacements_keep_types(self):
+        original = get_operators(parse(PROBLEM, SMT_25_STRING))
+        for seed in range(20):
+            fuzzed = get_operators(fuzz(parse(PROBLEM, SMT_25_STRING), True, rng=random.Random(seed)))
+            self.assertEqual(len(fuzzed), len(original))
+            for before, after in zip(original, fuzzed):
+                if before in REPLACEMENTS:
+                    self.assertIn(after, REPLACEMENTS[before])
+                else:
+                    self.assertEqual(after, before)
+
+if __name__ == '__main__':
+    unittest.main()
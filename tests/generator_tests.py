@@ -0,0 +1,26 @@
+import unittest
+
+from stringfuzz.constants import LANGUAGES, SMT_20_STRING, SMT_25_STRING
+from stringfuzz.generator import encode_char, encode_string
+
+def slow_encode_string(s, language):
+    return '"' + ''.join(encode_char(c, language) for c in s) + '"'
+
+class TestGenerator(unittest.TestCase):
+
+    def test_encode_safe(self):
+        for language in LANGUAGES:
+            self.assertEqual(encode_string('abc123', language), '"abc123"')
+            self.assertEqual(encode_string('', language), '""')
+
+    def test_encode_quotes(self):
+        self.assertEqual(encode_string('a"b', SMT_25_STRING), '"a""b"')
+        self.assertEqual(encode_string('a"b', SMT_20_STRING), '"a\\"b"')
+
+    def test_encode_matches_per_char(self):
+        text = ''.join(chr(i) for i in range(300)) + '\U0001f600'
+        for language in LANGUAGES:
+            self.assertEqual(encode_string(text, language), slow_encode_string(text, language))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+import sys
+import random
+import unittest
+import threading
+
+from stringfuzz.constants import SMT_25_STRING
+from stringfuzz.generator import generate
+from stringfuzz.ast import AssertNode, ExpressionNode, BOOL_SORT
+from stringfuzz.generators import concats, random_ast, SYNTACTIC_DEPTH
+from stringfuzz.scanner import ALPHABET
+from stringfuzz.util import instance_seed, random_string, random_strings, CHUNK_SIZE
+from stringfuzz.transformers.fuzz import fuzz_string
+
+def make_concats(depth, num_extracts=0, rng=random, balanced=False):
+    return concats(
+        depth             = depth,
+        depth_type        = SYNTACTIC_DEPTH,
+        solution          = None,
+        balanced          = balanced,
+        num_extracts      = num_extracts,
+        max_extract_index = 5,
+        rng               = rng,
+    )
+
+def count_nodes(expression):
+    count = 0
+    stack = [expression]
+    while len(stack) > 0:
+        node   = stack.pop()
+        count += 1
+        if isinstance(node, ExpressionNode):
+            stack.extend(node.body)
+    return count
+
+def make_random_ast(semantically_valid=True, rng=random, **kwargs):
+    return random_ast(
+        num_vars            = 3,
+        num_asserts         = 20,
+        depth               = 6,
+        max_terms           = 5,
+        max_str_lit_length  = 5,
+        max_int_lit         = 10,
+        literal_probability = 0.3,
+        semantically_valid  = semantically_valid,
+        rng                 = rng,
+        **kwargs
+    )
+
+class TestGenerators(unittest.TestCase):
+
+    def test_numbering_starts_over(self):
+        first  = generate(make_concats(3), SMT_25_STRING)
+        second = generate(make_concats(3), SMT_25_STRING)
+        self.assertEqual(first, second)
+        self.assertIn('var0', first)
+
+    def test_concurrent_generation(self):
+        expected = generate(make_concats(50), SMT_25_STRING)
+        results  = []
+
+        def worker():
+            results.append(generate(make_concats(50), SMT_25_STRING))
+
+        threads = [threading.Thread(target=worker) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertListEqual(results, [expected] * len(threads))
+
+    def test_concats_shape(self):
+        self.assertIn('(str.++ var3 (str.++ var2 var1))', generate(make_concats(2), SMT_25_STRING))
+        self.assertIn('(str.++ (str.++ var4 var3) (str.++ var2 var1))', generate(make_concats(2, balanced=True), SMT_25_STRING))
+
+    def test_deep_concats(self):
+        depth = sys.getrecursionlimit() * 2
+        text  = generate(make_concats(depth), SMT_25_STRING)
+        self.assertEqual(text.count('str.++'), depth)
+
+    def test_seeded_generation(self):
+        first  = generate(make_concats(10, 20, random.Random(7)), SMT_25_STRING)
+        second = generate(make_concats(10, 20, random.Random(7)), SMT_25_STRING)
+        other  = generate(make_concats(10, 20, random.Random(8)), SMT_25_STRING)
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+
+    def test_random_ast_sorts(self):
+        asserts = [e for e in make_random_ast(rng=random.Random(3)) if isinstance(e, AssertNode)]
+        self.assertEqual(len(asserts), 20)
+        for a in asserts:
+            self.assertEqual(a.body[0].get_sort(), BOOL_SORT)
+
+    def test_seeded_random_ast(self):
+        for semantically_valid in [True, False]:
+            first  = generate(make_random_ast(semantically_valid, random.Random(7)), SMT_25_STRING)
+            second = generate(make_random_ast(semantically_valid, random.Random(7)), SMT_25_STRING)
+            self.assertEqual(first, second)
+
+    def test_sized_random_ast(self):
+        for semantically_valid in [True, False]:
+            ast     = make_random_ast(semantically_valid, random.Random(5), size=30, size_tolerance=0)
+            asserts = [e for e in ast if isinstance(e, AssertNode)]
+            self.assertListEqual([count_nodes(a.body[0]) for a in asserts], [30] * 20)
+
+        ast   = make_random_ast(True, random.Random(5), size=500, size_tolerance=0.1)
+        sizes = [count_nodes(e.body[0]) for e in ast if isinstance(e, AssertNode)]
+        self.assertTrue(all(450 <= size <= 550 for size in sizes))
+
+    def test_big_exact_sizes(self):
+        for semantically_valid in [True, False]:
+            ast     = make_random_ast(semantically_valid, random.Random(5), size=1000, size_tolerance=0)
+            asserts = [e for e in ast if isinstance(e, AssertNode)]
+            self.assertListEqual([count_nodes(a.body[0]) for a in asserts], [1000] * 20)
+
+        # tolerances too tight for rejection are met by counting too
+        ast   = make_random_ast(True, random.Random(5), size=2000, size_tolerance=0.01)
+        sizes = [count_nodes(e.body[0]) for e in ast if isinstance(e, AssertNode)]
+        self.assertTrue(all(1980 <= size <= 2020 for size in sizes))
+
+    def test_concurrent_exact_sizes(self):
+
+        # NOTE:
+        #      the counts behind exact sizes are shared, so threads that all
+        #      need bigger ones grow them at once
+        results = []
+
+        def worker():
+            ast = make_random_ast(False, random.Random(5), size=3000, size_tolerance=0)
+            results.append([count_nodes(e.body[0]) for e in ast if isinstance(e, AssertNode)])
+
+        threads = [threading.Thread(target=worker) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertListEqual(results, [[3000] * 20] * len(threads))
+
+    def test_random_strings(self):
+        length = CHUNK_SIZE * 2 + 3
+        text   = random_string(length, random.Random(4))
+        self.assertEqual(len(text), length)
+        self.assertEqual(set(text), set(ALPHABET))
+        self.assertEqual(text, random_string(length, random.Random(4)))
+        self.assertEqual(random_string(10, random.Random(4), 'ab\u1234'), random_string(10, random.Random(4), 'ab\u1234'))
+
+        strings = random_strings(3, 5, random.Random(4))
+        self.assertListEqual(strings, [text[0:5], text[5:10], text[10:15]])
+
+    def test_empty_random_strings(self):
+        self.assertListEqual(random_strings(3, 0, random.Random(4)), [''] * 3)
+
+        ast = random_ast(
+            num_vars            = 3,
+            num_asserts         = 20,
+            depth               = 6,
+            max_terms           = 5,
+            max_str_lit_length  = 0,
+            max_int_lit         = 10,
+            literal_probability = 1.0,
+            semantically_valid  = True,
+            rng                 = random.Random(4),
+        )
+        problem = generate(ast, SMT_25_STRING)
+        self.assertIn('""', problem)
+        self.assertNotIn('"', problem.replace('""', ''))
+
+    def test_seeded_fuzz(self):
+        first  = fuzz_string('abcdefgh' * 10, random.Random(2))
+        second = fuzz_string('abcdefgh' * 10, random.Random(2))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, 'abcdefgh' * 10)
+
+    def test_instance_seeds(self):
+        self.assertEqual(instance_seed(0, 5), instance_seed(0, 5))
+        self.assertNotEqual(instance_seed(0, 5), instance_seed(0, 6))
+        self.assertNotEqual(instance_seed(0, 5), instance_seed(1, 5))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,81 @@
+import os
+import random
 import unittest
+import tempfile
+
+from stringfuzz.constants import SMT_25_STRING
+from stringfuzz.parser import parse
+from stringfuzz.fuzzers.genetic import World, TextCache, FitnessCache, mutate_pop, judge
+
+PROBLEM = '(declare-fun x () String)\n(assert (= x "a"))\n(assert (= x "b"))\n(check-sat)'
+
+class CountingSolvers(object):
+    '''
+    Stands in for a solver pool, scoring problems by their length.
+    '''
+
+    def __init__(self):
+        self.judged = []
+
+    def score(self, problems, num_runs):
+        self.judged.extend(problems)
+        return [float(len(problem)) for problem in problems]
 
 class GeneticTest(unittest.TestCase):
-    pass
+
+    def test_texts_are_cached(self):
+        cache  = TextCache(SMT_25_STRING)
+        parent = parse(PROBLEM, SMT_25_STRING)
+        child  = mutate_pop(parent)
+
+        # each organism is generated once
+        text = cache.get(parent)
+        self.assertIs(cache.get(parent), text)
+        self.assertIn(b'(assert (= x "b"))', text)
+        self.assertNotIn(b'(assert (= x "b"))', cache.get(child))
+
+        # only survivors keep their texts
+        cache.keep([child])
+        self.assertEqual(list(cache.entries), [id(child)])
+
+    def test_fitness_is_memoised(self):
+        solvers = CountingSolvers()
+        world   = World(SMT_25_STRING, 'solver', random.Random(0), solvers, FitnessCache())
+        parent  = parse(PROBLEM, SMT_25_STRING)
+        child   = mutate_pop(parent)
+        clone   = list(child)
+
+        # clones are only judged once
+        scores = judge(world, [parent, child, clone])
+        self.assertEqual(scores[1], scores[2])
+        self.assertEqual(len(solvers.judged), 2)
+
+        # and survivors aren't judged again
+        self.assertEqual(judge(world, [child, parent]), [scores[1], scores[0]])
+        self.assertEqual(len(solvers.judged), 2)
+
+    def test_fitness_cache_keys(self):
+        cache = FitnessCache()
+        key   = cache.make_key(b'(check-sat)', 'solver', 5)
+        self.assertNotEqual(key, cache.make_key(b'(check-sat)', 'other-solver', 5))
+        self.assertNotEqual(key, cache.make_key(b'(check-sat)', 'solver', 10))
+        self.assertNotEqual(key, cache.make_key(b'(check-sat)\n', 'solver', 5))
+
+    def test_fitness_cache_eviction(self):
+        cache = FitnessCache(size=2)
+        cache.put('a', 1.0)
+        cache.put('b', 2.0)
+        cache.get('a')
+        cache.put('c', 3.0)
+        self.assertEqual(list(cache.entries), ['a', 'c'])
+
+    def test_fitness_cache_persistence(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path  = os.path.join(directory, 'fitness.json')
+            cache = FitnessCache(path=path)
+            cache.put('a', 1.0)
+            cache.save()
+            self.assertEqual(FitnessCache(path=path).get('a'), 1.0)
 
 if __name__ == '__main__':
     unittest.main()
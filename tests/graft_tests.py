@@ -0,0 +1,33 @@
+import random
+import unittest
+
+from stringfuzz.ast import *
+from stringfuzz.constants import SMT_25_STRING
+from stringfuzz.generator import generate
+from stringfuzz.parser import parse
+from stringfuzz.transformers import graft
+
+def graft_text(text, seed):
+    return generate(graft(parse(text, SMT_25_STRING), False, rng=random.Random(seed)), SMT_25_STRING)
+
+class TestGraft(unittest.TestCase):
+
+    def test_swaps_by_identity(self):
+
+        # the only int expression and the only int literal; the other 3 is
+        # equal to the grafted one, but mustn't move
+        text    = '(assert (= (str.len "ab") 3))\n(assert (= 3 3))'
+        grafted = graft_text(text, 0)
+        self.assertEqual(grafted, '(assert (= 3 (str.len "ab")))\n(assert (= 3 3))')
+
+    def test_nested(self):
+
+        # the literal is inside the expression, so it replaces it
+        text    = '(assert (str.in.re (str.++ "a" "b") re.allchar))'
+        results = set(graft_text(text, seed) for seed in range(20))
+        for result in results:
+            parse(result, SMT_25_STRING)
+        self.assertIn('(assert (str.in.re "a" re.allchar))', results)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+from stringfuzz.constants import SMT_25_STRING
+from stringfuzz.generator import generate
+from stringfuzz.parser import parse
+from stringfuzz.mergers import simple, simple_stream
+
+def parse_all(texts):
+    return [parse(text, SMT_25_STRING) for text in texts]
+
+class TestSimpleMerge(unittest.TestCase):
+
+    def test_round_robin(self):
+        asts   = parse_all([
+            '(declare-fun x () String) (assert (= x "a")) (assert (= x "b"))',
+            '(declare-fun x () String) (assert (= x "c"))',
+            '(declare-fun y () String)',
+        ])
+        merged = generate(simple(asts, False), SMT_25_STRING)
+        self.assertEqual(merged, '\n'.join([
+            '(declare-fun x () String)',
+            '(declare-fun y () String)',
+            '(assert (= x "a"))',
+            '(assert (= x "c"))',
+            '(assert (= x "b"))',
+        ]))
+
+    def test_many_asts(self):
+        texts  = ['(declare-fun x () String) (assert (= x "{}"))'.format(i % 10) * 50 for i in range(200)]
+        merged = simple(parse_all(texts), False)
+        self.assertEqual(len(merged), 11)
+
+    def test_streams(self):
+        texts   = ['(declare-fun x () String) (assert (= x "a"))', '(declare-fun x () String) (assert (= x "b"))']
+        streams = [iter(ast) for ast in parse_all(texts)]
+        merged  = simple_stream(streams, False)
+        self.assertEqual(generate(merged, SMT_25_STRING), generate(simple(parse_all(texts), False), SMT_25_STRING))
+
+    def test_renamed(self):
+        asts   = parse_all(['(declare-fun x () String)'] * 2)
+        merged = generate(simple(asts, True), SMT_25_STRING)
+        self.assertEqual(merged, '(declare-fun x_0 () String)\n(declare-fun x_1 () String)')
+
+    def test_renames_only_declared_names(self):
+        text   = '''
+            (declare-const x String)
+            (declare-fun g (String) Bool)
+            (define-fun f ((a String) (x String)) String (str.++ a x))
+            (assert (g (f x "b")))
+            (assert (str.in.re x re.nostr))
+        '''
+        merged = generate(simple(parse_all([text, text]), True), SMT_25_STRING)
+        self.assertIn('(declare-const x_1 String)', merged)
+        self.assertIn('(declare-fun g_1 (String) Bool)', merged)
+        self.assertIn('(define-fun f_1 ((a String) (x String)) String (str.++ a x))', merged)
+        self.assertIn('(assert (g_1 (f_1 x_1 "b")))', merged)
+        self.assertIn('(assert (str.in.re x_1 re.nostr))', merged)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,17 @@
+import io
 import unittest
 
 from stringfuzz.scanner import SMT_20, SMT_20_STRING, SMT_25_STRING
-from stringfuzz.parser import parse, parse_file
+from stringfuzz.parser import parse, parse_file, parse_commands, split_commands, ParsingError
+
+class TrickleStream(io.StringIO):
+    '''
+    A text stream that gives at most a few characters per read, to check
+    commands split across reads.
+    '''
+
+    def read(self, size=-1):
+        return super().read(3)
 
 class TestParser(unittest.TestCase):
 
@@ -65,5 +75,37 @@ class TestParser(unittest.TestCase):
 
         self.assertEqual(expressions[2].symbol.name, 'check-sat')
 
+class TestCommandStreams(unittest.TestCase):
+
+    def test_split_commands(self):
+        text = '''
+            ; a comment ( with a paren
+            (declare-fun x () String) // another )
+            (assert (= x "a(b"")c;d//e"))
+            (assert (= x a//b))
+        '''
+        commands = list(split_commands(TrickleStream(text), SMT_25_STRING))
+        self.assertEqual(len(commands), 3)
+        self.assertTrue(commands[1].endswith('(assert (= x "a(b"")c;d//e"))'))
+        self.assertTrue(commands[2].endswith('(assert (= x a//b))'))
+
+    def test_escaped_quotes(self):
+        text     = '(assert (= x "a\\")b")) (check-sat)'
+        commands = list(split_commands(TrickleStream(text), SMT_20_STRING))
+        self.assertEqual(commands, ['(assert (= x "a\\")b"))', ' (check-sat)'])
+
+    def test_same_as_parse(self):
+        text = '''
+            (declare-fun x () String)
+            (assert (str.in.re x (re.* (str.to.re "ab"))))
+            (check-sat)
+        '''
+        self.assertEqual(list(parse_commands(TrickleStream(text), SMT_25_STRING)), parse(text, SMT_25_STRING))
+
+    def test_trailing_garbage(self):
+        with self.assertRaises(ParsingError):
+            list(parse_commands(TrickleStream('(check-sat) x ; comment'), SMT_25_STRING))
+        self.assertEqual(len(list(parse_commands(TrickleStream('(check-sat) ; comment'), SMT_25_STRING))), 1)
+
 if __name__ == '__main__':
     unittest.main()
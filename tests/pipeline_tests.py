@@ -0,0 +1,46 @@
+import random
+import unittest
+
+from stringfuzz.constants import SMT_25_STRING
+from stringfuzz.generator import generate
+from stringfuzz.parser import parse
+from stringfuzz.pipeline import run_pipeline, Stage
+from stringfuzz.transformers import translate, multiply, fuzz, reverse
+
+PROBLEM = '''
+(declare-fun x () String)
+(assert (= x (str.++ "abc" "de")))
+(assert (str.in.re x (re.range "a" "c")))
+(assert (= (str.len x) 5))
+'''
+
+def make_stages(rng):
+    return [
+        Stage(translate, {'integer_flag': True, 'skip_re_range': True, 'rng': rng}),
+        Stage(multiply, {'factor': 3, 'skip_re_range': False}),
+        Stage(reverse, {}),
+        Stage(multiply, {'factor': 2, 'skip_re_range': True}),
+        Stage(translate, {'integer_flag': False, 'skip_re_range': False, 'rng': rng}),
+        Stage(fuzz, {'skip_re_range': True, 'rng': rng}),
+    ]
+
+def run(seed, fuse):
+    ast = parse(PROBLEM, SMT_25_STRING)
+    return generate(run_pipeline(ast, make_stages(random.Random(seed)), fuse=fuse), SMT_25_STRING)
+
+class TestPipeline(unittest.TestCase):
+
+    def test_stages_in_order(self):
+        ast    = parse(PROBLEM, SMT_25_STRING)
+        stages = [Stage(reverse, {}), Stage(multiply, {'factor': 2, 'skip_re_range': True})]
+        result = generate(run_pipeline(ast, stages), SMT_25_STRING)
+        self.assertIn('(str.++ "eedd" "ccbbaa")', result)
+        self.assertIn('(re.range "a" "c")', result)
+        self.assertIn('10', result)
+
+    def test_fused_same_as_unfused(self):
+        for seed in range(10):
+            self.assertEqual(run(seed, True), run(seed, False))
+
+if __name__ == '__main__':
+    unittest.main()
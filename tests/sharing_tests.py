@@ -0,0 +1,43 @@
+import unittest
+
+from stringfuzz.constants import SMT_25_STRING
+from stringfuzz.parser import parse
+from stringfuzz.generator import generate
+from stringfuzz.sharing import share, StructuralIndex
+from stringfuzz.ast import FunctionDefinitionNode
+
+PROBLEM = '''
+    (declare-fun x () String)
+    (declare-fun shared0 () String)
+    (assert (= (str.++ (str.++ x x) (str.++ x x)) (str.++ (str.++ x x) (str.++ x x))))
+    (assert (= (str.len (str.++ x x)) 4))
+    (check-sat)
+'''
+
+class TestSharing(unittest.TestCase):
+
+    def test_structural_ids(self):
+        a, b = parse('(assert (= x "a")) (assert (= x "a"))', SMT_25_STRING)
+        c,   = parse('(assert (= x "b"))', SMT_25_STRING)
+        index = StructuralIndex()
+        self.assertEqual(index.index(a), index.index(b))
+        self.assertNotEqual(index.index(a), index.index(c))
+
+    def test_no_repeats(self):
+        ast = parse('(declare-fun x () String) (assert (= x "a")) (check-sat)', SMT_25_STRING)
+        self.assertEqual(generate(share(ast), SMT_25_STRING), generate(ast, SMT_25_STRING))
+
+    def test_repeats_defined_once(self):
+        shared      = share(parse(PROBLEM, SMT_25_STRING))
+        definitions = [e for e in shared if isinstance(e, FunctionDefinitionNode)]
+        names       = [d.body[0].name for d in definitions]
+
+        self.assertEqual(len(definitions), 2)
+        self.assertNotIn('shared0', names)
+
+    def test_round_trip(self):
+        text = generate(share(parse(PROBLEM, SMT_25_STRING)), SMT_25_STRING)
+        self.assertEqual(generate(parse(text, SMT_25_STRING), SMT_25_STRING), text)
+
+if __name__ == '__main__':
+    unittest.main()
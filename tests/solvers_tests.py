@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+import shlex
+import unittest
+import tempfile
+
+from unittest import mock
+
+from stringfuzz.fuzzers.solvers import SolverPool, time_solver, get_cpus
+
+# a "solver" that writes down the CPUs it may run on
+AFFINITY_SCRIPT = 'import os, sys; open(sys.argv[1], "w").write(repr(sorted(os.sched_getaffinity(0))))'
+
+class TestSolverPool(unittest.TestCase):
+
+    def test_runs_are_concurrent(self):
+        problems = [b'a', b'b', b'c', b'd']
+        with SolverPool('sleep 0.2', 5, jobs=8) as solvers:
+            start  = time.monotonic()
+            scores = solvers.score(problems, 2)
+            took   = time.monotonic() - start
+
+        self.assertEqual(len(scores), len(problems))
+        for score in scores:
+            self.assertGreaterEqual(score, 0.2)
+
+        # all eight runs fit in the pool at once
+        self.assertLess(took, 0.2 * 8)
+
+    def get_pinned_cpus(self, cpu):
+        with tempfile.TemporaryDirectory() as directory:
+            path    = os.path.join(directory, 'affinity')
+            command = ' '.join(shlex.quote(a) for a in [sys.executable, '-c', AFFINITY_SCRIPT, path])
+            time_solver(command, b'', 5, cpu=cpu)
+            with open(path) as file:
+                return file.read()
+
+    @unittest.skipUnless(hasattr(os, 'sched_setaffinity'), 'can\'t pin processes here')
+    def test_runs_are_pinned(self):
+        cpu = get_cpus()[-1]
+        self.assertEqual(self.get_pinned_cpus(cpu), repr([cpu]))
+
+        # without taskset, the shell is pinned once it's started
+        with mock.patch('stringfuzz.fuzzers.solvers.TASKSET', None):
+            self.assertEqual(self.get_pinned_cpus(cpu), repr([cpu]))
+
+    def test_timeouts(self):
+        with SolverPool('sleep 10', 0.1, jobs=2) as solvers:
+            self.assertEqual(solvers.score([b'a'], 2), [0.1])
+
+if __name__ == '__main__':
+    unittest.main()
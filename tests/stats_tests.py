@@ -0,0 +1,146 @@
+import io
+import os
+import csv
+import gzip
+import json
+import unittest
+import tempfile
+
+from stringfuzz.analyser import summarise, get_length_bucket
+from stringfuzz.constants import SMT_20_STRING, SMT_25_STRING
+from stringfuzz.parser import parse
+from stringfuzz.stats import Aggregate, StatsIndex, analyse_problems, write_json, write_csv, TOTAL_NAME
+
+PROBLEMS = {
+    'a.smt2':   '(declare-fun x () String)\n(assert (= x (str.++ "ab" (str.++ "c" x))))',
+    'b.smt2':   '(declare-fun y () String)\n(assert (= (str.len y) 12345))',
+    'bad.smt2': '(assert (',
+}
+
+class TestStats(unittest.TestCase):
+
+    def test_summarise(self):
+        stats = summarise(parse(PROBLEMS['a.smt2'], SMT_25_STRING))
+        self.assertEqual(stats['expressions'], 5)
+        self.assertEqual(stats['string_literals'], 2)
+        self.assertEqual(stats['string_literal_length'], 3)
+        self.assertEqual(stats['max_nesting'], 2)
+        self.assertEqual(stats['operators']['Concat'], 2)
+        self.assertEqual(stats['string_literal_lengths'], {1: 1, 2: 1})
+        self.assertEqual(stats['nestings'], {1: 1, 2: 1})
+
+    def test_variable_sorts(self):
+        text  = '(declare-fun x () String)\n(declare-const y Int)\n(declare-fun z () (Seq Int))\n(declare-fun f (Int) Int)'
+        stats = summarise(parse(text, SMT_25_STRING))
+        self.assertEqual(stats['variable_sorts'], {'String': 1, 'Int': 1, '(Seq Int)': 1})
+
+    def test_length_buckets(self):
+        self.assertEqual([get_length_bucket(n) for n in [0, 1, 2, 3, 4, 7, 8, 1000]], [0, 1, 2, 2, 4, 4, 8, 512])
+
+    def test_aggregate(self):
+        a = summarise(parse(PROBLEMS['a.smt2'], SMT_25_STRING))
+        b = summarise(parse(PROBLEMS['b.smt2'], SMT_25_STRING))
+
+        aggregate = Aggregate()
+        for record in [a, b, {'error': 'ParsingError'}]:
+            aggregate.add(record)
+        total = aggregate.to_dict()
+
+        self.assertEqual(total['problems'], 2)
+        self.assertEqual(total['failed'], 1)
+        self.assertEqual(total['expressions'], a['expressions'] + b['expressions'])
+        self.assertEqual(total['max_depth'], max(a['max_depth'], b['max_depth']))
+        self.assertEqual(total['operators']['assert'], 2)
+
+    def test_corpus(self):
+        with tempfile.TemporaryDirectory() as directory:
+            problems = []
+            for name, text in sorted(PROBLEMS.items()):
+                path = os.path.join(directory, name)
+                with open(path, 'w') as file:
+                    file.write(text)
+                problems.append((path, name))
+
+            serial   = list(analyse_problems(problems, SMT_25_STRING, 1))
+            parallel = list(analyse_problems(problems, SMT_25_STRING, 2))
+
+        self.assertEqual(serial, parallel)
+        self.assertIn('error', serial[2])
+
+        # csv has a row per problem, and one for the totals
+        output = io.StringIO()
+        write_csv(serial, output)
+        rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+        self.assertEqual([row['file'] for row in rows], ['a.smt2', 'b.smt2', 'bad.smt2', TOTAL_NAME])
+        self.assertEqual(int(rows[-1]['expressions']), serial[0]['expressions'] + serial[1]['expressions'])
+
+        # json has every problem, and the totals
+        output = io.StringIO()
+        write_json(serial, output)
+        written = json.loads(output.getvalue())
+        self.assertEqual(len(written['problems']), 3)
+        self.assertEqual(written['total']['failed'], 1)
+
+    def test_broken_problems_are_counted(self):
+        with tempfile.TemporaryDirectory() as directory:
+            problems = [
+                (os.path.join(directory, 'a.smt2.gz'), 'a.smt2.gz', gzip.compress(PROBLEMS['a.smt2'].encode())[:20]),
+                (os.path.join(directory, 'deep.smt2'), 'deep.smt2', ('(assert ' + '(not ' * 5000 + 'true' + ')' * 5001).encode()),
+                (os.path.join(directory, 'b.smt2'), 'b.smt2', PROBLEMS['b.smt2'].encode()),
+            ]
+            for path, name, data in problems:
+                with open(path, 'wb') as file:
+                    file.write(data)
+
+            records = list(analyse_problems([(path, name) for path, name, data in problems], SMT_25_STRING, 2))
+
+        self.assertIn('EOFError', records[0]['error'])
+        self.assertIn('RecursionError', records[1]['error'])
+        self.assertNotIn('error', records[2])
+
+class TestIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.index     = StatsIndex(os.path.join(self.directory.name, 'stats.db'))
+        self.problems  = []
+        for name, text in sorted(PROBLEMS.items()):
+            path = os.path.join(self.directory.name, name)
+            with open(path, 'w') as file:
+                file.write(text)
+            self.problems.append((path, name))
+
+    def tearDown(self):
+        self.index.close()
+        self.directory.cleanup()
+
+    def test_unchanged_problems_are_reused(self):
+        first  = list(analyse_problems(self.problems, SMT_25_STRING, 1, self.index))
+        second = list(analyse_problems(self.problems, SMT_25_STRING, 1, self.index))
+        self.assertEqual(first, second)
+
+        # histograms keep their numeric keys
+        self.assertEqual(second[0]['depths'], summarise(parse(PROBLEMS['a.smt2'], SMT_25_STRING))['depths'])
+
+        # only problems that could be summarised are indexed
+        self.assertEqual(len(list(self.index.records(SMT_25_STRING))), 2)
+        self.assertEqual(list(self.index.records(SMT_20_STRING)), [])
+
+    def test_changed_problems_are_reanalysed(self):
+        before = list(analyse_problems(self.problems, SMT_25_STRING, 1, self.index))
+
+        # touching a problem doesn't change its record
+        path = self.problems[0][0]
+        os.utime(path, ns=(0, 0))
+        self.assertEqual(list(analyse_problems(self.problems, SMT_25_STRING, 1, self.index)), before)
+
+        # changing it does
+        with open(path, 'a') as file:
+            file.write('\n(assert (= x "d"))')
+        after = list(analyse_problems(self.problems, SMT_25_STRING, 1, self.index))
+        self.assertNotEqual(after[0]['sha256'], before[0]['sha256'])
+        self.assertEqual(after[0]['string_literals'], before[0]['string_literals'] + 1)
+        self.assertEqual(after[1], before[1])
+
+if __name__ == '__main__':
+    unittest.main()